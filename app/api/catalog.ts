@@ -0,0 +1,68 @@
+import crypto from 'crypto';
+import { NextRequest, NextResponse } from 'next/server';
+import catalog from './catalog.json';
+
+// Generated by scripts/build_catalog.py from the files in public/Round N
+export interface CatalogPuzzle {
+  filename: string;
+  name: string;
+  description: string;
+  functions: string[];
+  // Number of places that call input()
+  inputSites: number;
+  seedsRandom: boolean;
+  interactive: boolean;
+  size: number;
+  sha256: string;
+  code: string;
+}
+
+const rounds: Record<string, CatalogPuzzle[]> = catalog.rounds;
+
+export function roundPuzzles(roundNumber: number): CatalogPuzzle[] | undefined {
+  return rounds[roundNumber];
+}
+
+export function findPuzzle(roundNumber: number, filename: string) {
+  return rounds[roundNumber]?.find((puzzle) => puzzle.filename === filename);
+}
+
+// "round/filename" of each puzzle by the SHA-256 of its code
+const labelsBySha256 = new Map(
+  Object.entries(rounds).flatMap(([round, puzzles]) =>
+    puzzles.map((puzzle) => [puzzle.sha256, `${round}/${puzzle.filename}`] as const)
+  )
+);
+
+// Which puzzle some code is, for labelling metrics; "other" if it was edited or isn't one
+export function puzzleLabel(code: string) {
+  return labelsBySha256.get(crypto.createHash('sha256').update(code).digest('hex')) ?? 'other';
+}
+
+// A JSON response body serialised once, with an ETag for conditional requests
+export interface CachedBody {
+  body: string;
+  etag: string;
+}
+
+export function cachedBody(data: object): CachedBody {
+  const body = JSON.stringify(data);
+  const etag = `"${crypto.createHash('sha1').update(body).digest('base64url')}"`;
+  return { body, etag };
+}
+
+export function respondCached(request: NextRequest, cached: CachedBody) {
+  const headers = {
+    ETag: cached.etag,
+    'Cache-Control': 'public, s-maxage=3600, stale-while-revalidate=86400'
+  };
+
+  const ifNoneMatch = request.headers.get('if-none-match');
+  if (ifNoneMatch && ifNoneMatch.split(',').some((tag) => tag.trim() === cached.etag)) {
+    return new NextResponse(null, { status: 304, headers });
+  }
+
+  return new NextResponse(cached.body, {
+    headers: { ...headers, 'Content-Type': 'application/json' }
+  });
+}
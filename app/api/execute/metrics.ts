@@ -0,0 +1,167 @@
+// In-memory counters and fixed-bucket histograms for the execute API,
+// rendered in the Prometheus text format by /api/metrics
+import crypto from 'crypto';
+import { NextRequest } from 'next/server';
+
+type Labels = Record<string, string>;
+
+function labelKey(labels: Labels) {
+  return JSON.stringify(Object.entries(labels).sort(([a], [b]) => a.localeCompare(b)));
+}
+
+function escapeLabelValue(value: string) {
+  return value.replace(/\\/g, '\\\\').replace(/"/g, '\\"').replace(/\n/g, '\\n');
+}
+
+function formatLabels(labels: Labels, extra?: Labels) {
+  const entries = Object.entries({ ...labels, ...extra });
+  if (entries.length === 0) return '';
+  return `{${entries.map(([name, value]) => `${name}="${escapeLabelValue(value)}"`).join(',')}}`;
+}
+
+export class Counter {
+  private values = new Map<string, { labels: Labels; value: number }>();
+
+  constructor(readonly name: string, readonly help: string) {}
+
+  inc(labels: Labels = {}, amount = 1) {
+    const key = labelKey(labels);
+    const entry = this.values.get(key);
+    if (entry) {
+      entry.value += amount;
+    } else {
+      this.values.set(key, { labels, value: amount });
+    }
+  }
+
+  render() {
+    const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} counter`];
+    for (const { labels, value } of this.values.values()) {
+      lines.push(`${this.name}${formatLabels(labels)} ${value}`);
+    }
+    return lines.join('\n');
+  }
+}
+
+export class Histogram {
+  private series = new Map<string, { labels: Labels; counts: number[]; sum: number; count: number }>();
+
+  // `buckets` are the upper bounds, in increasing order; +Inf is implied
+  constructor(readonly name: string, readonly help: string, private readonly buckets: number[]) {}
+
+  observe(labels: Labels, value: number) {
+    const key = labelKey(labels);
+    let series = this.series.get(key);
+    if (!series) {
+      series = { labels, counts: new Array(this.buckets.length).fill(0), sum: 0, count: 0 };
+      this.series.set(key, series);
+    }
+
+    const bucket = this.buckets.findIndex((bound) => value <= bound);
+    if (bucket >= 0) {
+      series.counts[bucket]++;
+    }
+    series.sum += value;
+    series.count++;
+  }
+
+  render() {
+    const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} histogram`];
+    for (const { labels, counts, sum, count } of this.series.values()) {
+      let cumulative = 0;
+      this.buckets.forEach((bound, i) => {
+        cumulative += counts[i];
+        lines.push(`${this.name}_bucket${formatLabels(labels, { le: String(bound) })} ${cumulative}`);
+      });
+      lines.push(`${this.name}_bucket${formatLabels(labels, { le: '+Inf' })} ${count}`);
+      lines.push(`${this.name}_sum${formatLabels(labels)} ${sum}`);
+      lines.push(`${this.name}_count${formatLabels(labels)} ${count}`);
+    }
+    return lines.join('\n');
+  }
+}
+
+// A value read when the metrics are scraped
+export function gauge(name: string, help: string, value: number) {
+  return [`# HELP ${name} ${help}`, `# TYPE ${name} gauge`, `${name} ${value}`].join('\n');
+}
+
+const LATENCY_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10];
+const DURATION_BUCKETS = [0.01, 0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800];
+const MEMORY_BUCKETS = [8, 16, 32, 64, 128, 256, 512, 1024].map((mb) => mb * 1024 * 1024);
+
+export const executeMetrics = {
+  workerStartup: new Histogram(
+    'puzzle_execute_worker_startup_seconds',
+    'Time from spawning a Python worker until it is ready for sessions.',
+    LATENCY_BUCKETS
+  ),
+  workerAcquire: new Histogram(
+    'puzzle_execute_worker_acquire_seconds',
+    'Time a session waited for a worker, by whether a warm worker was available.',
+    LATENCY_BUCKETS
+  ),
+  sessionSpawn: new Histogram(
+    'puzzle_execute_session_spawn_seconds',
+    'Time from sending a program to a worker until its forked child was running.',
+    LATENCY_BUCKETS
+  ),
+  firstOutput: new Histogram(
+    'puzzle_execute_first_output_seconds',
+    'Time from sending a program to a worker until its first output.',
+    LATENCY_BUCKETS
+  ),
+  promptRoundTrip: new Histogram(
+    'puzzle_execute_prompt_round_trip_seconds',
+    'Time from sending a line of input until the program asked for the next one or finished.',
+    LATENCY_BUCKETS
+  ),
+  sessionDuration: new Histogram(
+    'puzzle_execute_session_duration_seconds',
+    'Wall-clock time from starting a session until the program exited.',
+    DURATION_BUCKETS
+  ),
+  childMaxRss: new Histogram(
+    'puzzle_execute_child_max_rss_bytes',
+    'Peak resident memory of the process that ran a session.',
+    MEMORY_BUCKETS
+  ),
+  childCpu: new Counter(
+    'puzzle_execute_child_cpu_seconds_total',
+    'CPU time used by the processes that ran sessions, by mode.'
+  ),
+  sessions: new Counter(
+    'puzzle_execute_sessions_total',
+    'Sessions started, by whether they ran on Python or were replayed from the cache.'
+  ),
+  exits: new Counter(
+    'puzzle_execute_exits_total',
+    'Sessions that finished, by exit code (negative codes are signals).'
+  ),
+  cacheSteps: new Counter(
+    'puzzle_execute_cache_steps_total',
+    'Program steps looked up in the result cache, by result.'
+  ),
+  rejected: new Counter(
+    'puzzle_execute_rejected_total',
+    'Sessions refused because the server was at capacity, by reason.'
+  ),
+  idleKilled: new Counter(
+    'puzzle_execute_idle_killed_total',
+    'Sessions killed after nobody talked to them for too long.'
+  )
+};
+
+export function renderMetrics(gauges: string[] = []) {
+  return [...Object.values(executeMetrics).map((metric) => metric.render()), ...gauges].join('\n') + '\n';
+}
+
+// Whether a request may read the execute API's stats and metrics. With
+// EXECUTE_STATS_TOKEN set, it needs "Authorization: Bearer <token>".
+export function canReadStats(request: NextRequest) {
+  const token = process.env.EXECUTE_STATS_TOKEN;
+  if (!token) return true;
+
+  const digest = (value: string) => crypto.createHash('sha256').update(value).digest();
+  return crypto.timingSafeEqual(digest(request.headers.get('authorization') ?? ''), digest(`Bearer ${token}`));
+}
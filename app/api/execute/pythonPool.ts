@@ -0,0 +1,307 @@
+import { spawn, ChildProcessWithoutNullStreams } from 'child_process';
+import { EventEmitter } from 'events';
+import { StringDecoder } from 'string_decoder';
+import { executeMetrics } from './metrics';
+import { PYTHON_WORKER_SOURCE } from './pythonWorker';
+
+// Frame kinds sent by the Python worker (see pythonWorker.ts)
+const FRAME_READY = 'r';
+const FRAME_STDOUT = 'o';
+const FRAME_STDERR = 'e';
+const FRAME_INPUT = 'i';
+const FRAME_CHILD = 'c';
+const FRAME_EXIT = 'x';
+const FRAME_PROFILE = 'p';
+
+const FRAME_HEADER_SIZE = 5;
+
+// Resource limits applied to the forked session process
+export interface SessionLimits {
+  cpuSeconds?: number;
+  memoryBytes?: number;
+}
+
+// Resources used by the forked process that ran a session
+export interface ChildUsage {
+  userSeconds: number;
+  systemSeconds: number;
+  maxRssBytes: number;
+}
+
+// What a profiled session reports when it finishes (see profile_exec in pythonWorker.ts)
+export interface ProfileSummary {
+  cpuSeconds: number;
+  peakMemoryBytes: number;
+  // Top functions by cumulative CPU time
+  functions: Array<{
+    function: string;
+    file: string;
+    line: number;
+    calls: number;
+    totalSeconds: number;
+    cumulativeSeconds: number;
+  }>;
+  // Top allocation sites still holding memory at the end of the run
+  allocations: Array<{ file: string; line: number; sizeBytes: number; count: number }>;
+  // "frame;frame;frame count" lines, the input format of flamegraph.pl and speedscope
+  collapsedStacks: string;
+}
+
+// Incrementally splits the worker's stdout into frames
+export class FrameDecoder {
+  private buffer = Buffer.alloc(0);
+
+  push(chunk: Buffer, onFrame: (kind: string, payload: Buffer) => void) {
+    this.buffer = this.buffer.length > 0 ? Buffer.concat([this.buffer, chunk]) : chunk;
+
+    while (this.buffer.length >= FRAME_HEADER_SIZE) {
+      const end = FRAME_HEADER_SIZE + this.buffer.readUInt32BE(1);
+      if (this.buffer.length < end) break;
+
+      const kind = String.fromCharCode(this.buffer[0]);
+      const payload = this.buffer.subarray(FRAME_HEADER_SIZE, end);
+      this.buffer = this.buffer.subarray(end);
+      onFrame(kind, payload);
+    }
+  }
+}
+
+// A warm Python process that runs one session at a time.
+//
+// Events while a session is running:
+//   'output' (text)        - text the program wrote to stdout
+//   'errorOutput' (text)   - text the program or the worker wrote to stderr
+//   'sessionSpawn' (pid)   - the forked process running the program has started
+//   'inputRequest'         - the program called input() and is waiting for a line
+//   'profile' (summary)    - a profiled session finished running the program
+//   'sessionEnd' (code, usage?) - the session finished (or the worker died)
+export class PythonWorker extends EventEmitter {
+  readonly process: ChildProcessWithoutNullStreams;
+  // Resolves with the worker's sys.version once it is ready for sessions
+  readonly ready: Promise<string>;
+  uses = 0;
+  alive = true;
+  // Pid of the forked process running the current session, if any
+  sessionPid?: number;
+  private inSession = false;
+  private frames = new FrameDecoder();
+  private stdoutText = new StringDecoder('utf8');
+  private stderrText = new StringDecoder('utf8');
+  private readonly detached = process.platform !== 'win32';
+
+  constructor(pythonPath: string) {
+    super();
+
+    this.process = spawn(pythonPath, ['-u', '-c', PYTHON_WORKER_SOURCE], {
+      stdio: ['pipe', 'pipe', 'pipe'],
+      // Own process group, so killing the worker also kills a running session
+      detached: this.detached,
+      env: {
+        ...process.env,
+        PYTHONIOENCODING: 'utf-8',
+        PYTHONUNBUFFERED: '1',
+        // Same set/dict ordering in every worker, so cached results stay valid
+        PYTHONHASHSEED: '0'
+      }
+    });
+
+    this.ready = new Promise<string>((resolve, reject) => {
+      this.once('ready', resolve);
+      this.process.once('error', reject);
+      this.process.once('exit', () => reject(new Error('Python worker exited before it was ready')));
+    });
+    const spawnedAt = performance.now();
+    this.ready.then(
+      () => executeMetrics.workerStartup.observe({}, (performance.now() - spawnedAt) / 1000),
+      // Rejections are handled by whoever awaits readiness
+      () => {}
+    );
+
+    // Writing to a worker that just died must not crash the server
+    this.process.stdin.on('error', () => {});
+
+    this.process.stdout.on('data', (chunk: Buffer) => {
+      this.frames.push(chunk, (kind, payload) => this.handleFrame(kind, payload));
+    });
+
+    this.process.stderr.on('data', (chunk: Buffer) => {
+      this.emit('errorOutput', this.stderrText.write(chunk));
+    });
+
+    this.process.on('error', () => {
+      this.alive = false;
+    });
+
+    this.process.on('exit', (code) => {
+      this.alive = false;
+      this.endSession(code ?? -1);
+      this.emit('close');
+    });
+  }
+
+  private handleFrame(kind: string, payload: Buffer) {
+    switch (kind) {
+      case FRAME_READY:
+        this.emit('ready', payload.toString('utf8'));
+        break;
+      case FRAME_STDOUT:
+        this.emit('output', this.stdoutText.write(payload));
+        break;
+      case FRAME_STDERR:
+        this.emit('errorOutput', this.stderrText.write(payload));
+        break;
+      case FRAME_CHILD:
+        this.sessionPid = parseInt(payload.toString('utf8'));
+        this.emit('sessionSpawn', this.sessionPid);
+        break;
+      case FRAME_INPUT:
+        this.emit('inputRequest');
+        break;
+      case FRAME_PROFILE:
+        this.emit('profile', JSON.parse(payload.toString('utf8')));
+        break;
+      case FRAME_EXIT: {
+        const { exitCode, rusage } = JSON.parse(payload.toString('utf8'));
+        this.endSession(exitCode, rusage);
+        break;
+      }
+    }
+  }
+
+  private endSession(exitCode: number, usage?: ChildUsage) {
+    if (!this.inSession) return;
+    this.inSession = false;
+    this.sessionPid = undefined;
+    this.emit('sessionEnd', exitCode, usage);
+  }
+
+  // Start running code in a fresh interpreter forked from this worker
+  run(code: string, limits: SessionLimits = {}, profile = false) {
+    const request = Buffer.from(JSON.stringify({ code, limits, ...(profile && { profile }) }), 'utf8');
+    this.uses++;
+    this.inSession = true;
+    this.process.stdin.write(`\x1esession ${request.length}\n`);
+    this.process.stdin.write(request);
+  }
+
+  // Send one line of input to the running session
+  write(input: string) {
+    this.process.stdin.write(input.replace(/\x1e/g, '') + '\n');
+  }
+
+  // Stop reading the program's output; once the pipe fills up the program blocks on print()
+  pause() {
+    this.process.stdout.pause();
+  }
+
+  resume() {
+    this.process.stdout.resume();
+  }
+
+  // Drop the per-session listeners before the worker is reused
+  detachSession() {
+    this.removeAllListeners('output');
+    this.removeAllListeners('errorOutput');
+    this.removeAllListeners('sessionSpawn');
+    this.removeAllListeners('inputRequest');
+    this.removeAllListeners('profile');
+    this.removeAllListeners('sessionEnd');
+  }
+
+  kill() {
+    if (!this.alive) return;
+    try {
+      if (this.detached && this.process.pid) {
+        process.kill(-this.process.pid, 'SIGKILL');
+      } else {
+        this.process.kill('SIGKILL');
+      }
+    } catch {
+      // Already gone
+    }
+  }
+}
+
+interface PoolOptions {
+  pythonPath: string;
+  // Number of idle warm workers to keep around
+  size: number;
+  // Sessions a worker serves before it is replaced
+  maxUses: number;
+}
+
+// Keeps a few Python workers started and waiting, so a run only pays for a fork
+export class PythonWorkerPool {
+  private idle: PythonWorker[] = [];
+  private starting = 0;
+  // sys.version reported by the workers, once one has started
+  pythonVersion?: string;
+
+  constructor(private readonly options: PoolOptions) {}
+
+  async acquire(): Promise<PythonWorker> {
+    const started = performance.now();
+    let worker = this.idle.pop();
+    while (worker && !worker.alive) {
+      worker = this.idle.pop();
+    }
+
+    const start = worker ? 'warm' : 'cold';
+    if (!worker) {
+      // Cold start: nothing warm is available
+      worker = new PythonWorker(this.options.pythonPath);
+      try {
+        this.pythonVersion = await worker.ready;
+      } finally {
+        this.refill();
+      }
+    } else {
+      this.refill();
+    }
+
+    executeMetrics.workerAcquire.observe({ start }, (performance.now() - started) / 1000);
+    return worker;
+  }
+
+  release(worker: PythonWorker) {
+    worker.detachSession();
+    worker.resume();
+
+    if (!worker.alive || worker.uses >= this.options.maxUses || this.idle.length >= this.options.size) {
+      worker.kill();
+    } else {
+      this.idle.push(worker);
+    }
+
+    this.refill();
+  }
+
+  // Start workers in the background until the pool is back to its target size
+  private refill() {
+    while (this.idle.length + this.starting < this.options.size) {
+      this.starting++;
+      const worker = new PythonWorker(this.options.pythonPath);
+
+      worker.ready.then(
+        (version) => {
+          this.starting--;
+          this.pythonVersion = version;
+          this.idle.push(worker);
+          worker.once('close', () => {
+            this.idle = this.idle.filter((w) => w !== worker);
+          });
+        },
+        () => {
+          // Don't retry here; the next acquire() will try again
+          this.starting--;
+        }
+      );
+    }
+  }
+}
+
+export const pythonPool = new PythonWorkerPool({
+  pythonPath: process.env.PYTHON_PATH || 'python',
+  size: parseInt(process.env.PYTHON_POOL_SIZE || '4'),
+  maxUses: parseInt(process.env.PYTHON_WORKER_MAX_USES || '50')
+});
@@ -0,0 +1,303 @@
+// Source of the long-lived Python worker used by the execute route.
+//
+// The worker imports the commonly used modules once, then waits for session
+// requests on stdin. Each session runs in a forked child so it starts from the
+// warm interpreter but cannot leak state into later sessions. Everything the
+// worker sends back goes through fd 1 as frames: a 1-byte kind, a 4-byte
+// big-endian payload length and the payload. Stray writes to fd 1 from native
+// code are redirected to stderr so they cannot corrupt the frame stream.
+//
+// Instead of reading stdin directly, input() flushes the program's output and
+// sends an "i" frame, so the server knows exactly when the program is waiting.
+//
+// Programs are compiled in the worker before it forks, and the code objects
+// of recently run programs are kept, so running the same puzzle again skips
+// the compile step and the child starts straight from bytecode.
+//
+// Each session runs under the CPU-time and address-space limits given in its
+// request. The child's pid is reported in a "c" frame so the server can watch
+// its memory use, and the "x" frame that ends the session carries the child's
+// resource usage as reported by wait4().
+//
+// A session request with "profile": true runs the program under cProfile,
+// tracemalloc and a SIGPROF stack sampler, and sends a "p" frame with a JSON
+// summary before the program exits. The profiling modules are only imported
+// by such sessions, so other sessions run exactly as before.
+//
+// A session request is a line "\x1esession <length>\n" followed by <length>
+// bytes of JSON. Any other line is skipped, so unread input left over from a
+// previous session cannot be mistaken for a request.
+export const PYTHON_WORKER_SOURCE = String.raw`
+import builtins
+import io
+import json
+import math
+import os
+import random
+import signal
+import struct
+import sys
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+PROTOCOL = os.fdopen(os.dup(1), 'wb')
+os.dup2(2, 1)
+
+SESSION_MAGIC = b'\x1esession '
+
+CODE_CACHE_SIZE = 128
+code_cache = {}
+
+PROFILE_TOP_FUNCTIONS = 15
+PROFILE_TOP_ALLOCATIONS = 10
+PROFILE_MAX_STACKS = 500
+PROFILE_SAMPLE_SECONDS = 0.001
+
+
+def send_frame(kind, payload=b''):
+    PROTOCOL.write(struct.pack('>cI', kind, len(payload)) + payload)
+    PROTOCOL.flush()
+
+
+class FrameWriter(io.RawIOBase):
+    def __init__(self, kind):
+        self.kind = kind
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        send_frame(self.kind, bytes(data))
+        return len(data)
+
+
+def frame_stream(kind):
+    return io.TextIOWrapper(io.BufferedWriter(FrameWriter(kind)), encoding='utf-8',
+                            errors='replace', line_buffering=True)
+
+
+def read_line():
+    line = bytearray()
+    while not line.endswith(b'\n'):
+        byte = os.read(0, 1)
+        if not byte:
+            raise EOFError
+        line += byte
+    return bytes(line)
+
+
+def read_request():
+    line = read_line()
+    while not line.startswith(SESSION_MAGIC):
+        line = read_line()
+
+    remaining = int(line[len(SESSION_MAGIC):])
+    data = bytearray()
+    while remaining:
+        chunk = os.read(0, remaining)
+        if not chunk:
+            raise EOFError
+        data += chunk
+        remaining -= len(chunk)
+    return json.loads(data)
+
+
+def frame_input(prompt=''):
+    if prompt:
+        sys.stdout.write(str(prompt))
+    sys.stdout.flush()
+    sys.stderr.flush()
+    send_frame(b'i')
+
+    line = sys.stdin.readline()
+    if not line:
+        raise EOFError('EOF when reading a line')
+    return line.rstrip('\r\n')
+
+
+def compile_cached(source):
+    code = code_cache.pop(source, None)
+    if code is None:
+        code = compile(source, '<puzzle>', 'exec')
+        if len(code_cache) >= CODE_CACHE_SIZE:
+            del code_cache[next(iter(code_cache))]
+    # Re-inserted at the end, so the oldest entry is the least recently used
+    code_cache[source] = code
+    return code
+
+
+def apply_limits(limits):
+    if resource is None:
+        return
+
+    cpu_seconds = limits.get('cpuSeconds')
+    if cpu_seconds:
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+
+    memory_bytes = limits.get('memoryBytes')
+    if memory_bytes:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+
+
+def frame_name(code):
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+def profile_exec(code, namespace):
+    import cProfile
+    import pstats
+    import time
+    import tracemalloc
+
+    # Samples of the call stack every millisecond of CPU time, for flame graphs
+    stacks = {}
+
+    def sample(signum, frame):
+        names = []
+        while frame is not None:
+            names.append(frame.f_code)
+            frame = frame.f_back
+        names.reverse()
+        # Only keep the stack from the program's own module frame down
+        for i, frame_code in enumerate(names):
+            if frame_code.co_filename == '<puzzle>':
+                stack = ';'.join(frame_name(c) for c in names[i:])
+                stacks[stack] = stacks.get(stack, 0) + 1
+                return
+
+    sampling = hasattr(signal, 'setitimer')
+    if sampling:
+        signal.signal(signal.SIGPROF, sample)
+        signal.setitimer(signal.ITIMER_PROF, PROFILE_SAMPLE_SECONDS, PROFILE_SAMPLE_SECONDS)
+
+    # CPU time, so waiting for the user to type doesn't count
+    profiler = cProfile.Profile(time.process_time)
+    tracemalloc.start()
+    profiler.enable()
+    try:
+        exec(code, namespace)
+    finally:
+        profiler.disable()
+        if sampling:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        # Leave out the worker's own functions ('<string>') and the exec() call itself
+        stats = pstats.Stats(profiler).stats
+        functions = sorted(
+            (
+                (key, value) for key, value in stats.items()
+                if key[0] != '<string>' and key[2] != "<built-in method builtins.exec>"
+            ),
+            key=lambda item: item[1][3], reverse=True,
+        )[:PROFILE_TOP_FUNCTIONS]
+
+        allocations = snapshot.filter_traces([
+            tracemalloc.Filter(False, '<string>'),
+            tracemalloc.Filter(False, tracemalloc.__file__),
+        ]).statistics('lineno')[:PROFILE_TOP_ALLOCATIONS]
+
+        top_stacks = sorted(stacks.items(), key=lambda item: item[1], reverse=True)[:PROFILE_MAX_STACKS]
+
+        summary = {
+            'cpuSeconds': time.process_time(),
+            'peakMemoryBytes': peak,
+            'functions': [
+                {
+                    'function': function, 'file': filename, 'line': line,
+                    'calls': calls, 'totalSeconds': total, 'cumulativeSeconds': cumulative,
+                }
+                for (filename, line, function), (_, calls, total, cumulative, _) in functions
+            ],
+            'allocations': [
+                {
+                    'file': stat.traceback[0].filename, 'line': stat.traceback[0].lineno,
+                    'sizeBytes': stat.size, 'count': stat.count,
+                }
+                for stat in allocations
+            ],
+            'collapsedStacks': ''.join(f'{stack} {count}\n' for stack, count in top_stacks),
+        }
+        sys.stdout.flush()
+        send_frame(b'p', json.dumps(summary).encode())
+
+
+def rusage_summary(usage):
+    # ru_maxrss is in kilobytes on Linux but in bytes on macOS
+    max_rss = usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024
+    return {'userSeconds': usage.ru_utime, 'systemSeconds': usage.ru_stime, 'maxRssBytes': max_rss}
+
+
+def run_session(request, code):
+    sys.stdin = io.TextIOWrapper(io.FileIO(0, 'rb', closefd=False), encoding='utf-8')
+    sys.stdout = frame_stream(b'o')
+    sys.stderr = frame_stream(b'e')
+    builtins.input = frame_input
+    random.seed()
+
+    namespace = {'__name__': '__main__', '__builtins__': builtins}
+    run = profile_exec if request.get('profile') else exec
+    exit_code = 0
+    try:
+        if isinstance(code, Exception):
+            raise code
+        run(code, namespace)
+    except SystemExit as e:
+        if isinstance(e.code, int):
+            exit_code = e.code
+        elif e.code is not None:
+            print(e.code, file=sys.stderr)
+            exit_code = 1
+    except Exception as e:
+        print(f"Error: {str(e) or type(e).__name__}")
+    finally:
+        print("\n--- Execution completed ---")
+        sys.stdout.flush()
+        sys.stderr.flush()
+    return exit_code
+
+
+def serve():
+    send_frame(b'r', sys.version.encode())
+    while True:
+        try:
+            request = read_request()
+        except EOFError:
+            return
+
+        # A syntax error is reported by the session like any other error
+        try:
+            code = compile_cached(request['code'])
+        except Exception as e:
+            code = e
+
+        if not hasattr(os, 'fork'):
+            # No fork (Windows): run in this process and retire the worker.
+            exit_code = run_session(request, code)
+            send_frame(b'x', json.dumps({'exitCode': exit_code}).encode())
+            return
+
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 1
+            try:
+                apply_limits(request.get('limits', {}))
+                exit_code = run_session(request, code)
+            finally:
+                os._exit(exit_code)
+
+        send_frame(b'c', str(pid).encode())
+        _, status, usage = os.wait4(pid, 0)
+        exit_code = os.waitstatus_to_exitcode(status)
+        if exit_code == -signal.SIGXCPU:
+            send_frame(b'e', b'CPU time limit exceeded\n')
+        send_frame(b'x', json.dumps({'exitCode': exit_code, 'rusage': rusage_summary(usage)}).encode())
+
+
+serve()
+`;
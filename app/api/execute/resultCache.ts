@@ -0,0 +1,200 @@
+import crypto from 'crypto';
+import fs from 'fs';
+import path from 'path';
+
+// What a program printed between two input() calls (or before finishing)
+export interface CachedStep {
+  output: string;
+  completed: boolean;
+  exitCode?: number;
+}
+
+// Modules whose results can differ between two runs with the same code and input
+const NONDETERMINISTIC_MODULES = new Set([
+  'time', 'datetime', 'os', 'sys', 'secrets', 'uuid', 'socket', 'subprocess', 'threading',
+  'urllib', 'http', 'importlib', 'pathlib'
+]);
+
+// Calls whose results can differ between two runs
+const NONDETERMINISTIC_PATTERNS = [
+  /\b(getenv|environ|urandom|__import__|exec|eval|open|id)\s*\(/,
+  // random.seed() without an argument, or with None, seeds from the OS
+  /\brandom\.seed\(\s*(a\s*=\s*)?(None\s*)?\)/
+];
+
+// Top-level packages of every module the code imports
+function importedModules(code: string) {
+  const modules: string[] = [];
+  // "import a.b as c, d" lists every module; "from a.b import c" names one
+  for (const [, list] of code.matchAll(/(?:^|;)\s*import\s+([^;#\n]+)/gm)) {
+    for (const item of list.split(',')) {
+      modules.push(item.trim().split(/[.\s]/)[0]);
+    }
+  }
+  for (const [, name] of code.matchAll(/(?:^|;)\s*from\s+([\w.]+)\s+import\b/gm)) {
+    modules.push(name.split('.')[0]);
+  }
+  return modules;
+}
+
+// Whether a program's output is fully determined by its code and the lines typed in
+export function isDeterministic(code: string) {
+  if (importedModules(code).some((module) => NONDETERMINISTIC_MODULES.has(module))) {
+    return false;
+  }
+  if (NONDETERMINISTIC_PATTERNS.some((pattern) => pattern.test(code))) {
+    return false;
+  }
+
+  // Randomness is fine as long as the program seeds it itself
+  return !/\brandom\b/.test(code) || /\brandom\.seed\(/.test(code);
+}
+
+// Cache key for the step reached after typing `inputs` into `code`
+export function stepKey(pythonVersion: string, code: string, inputs: string[]) {
+  return crypto.createHash('sha256')
+    .update(JSON.stringify([pythonVersion, code, inputs]))
+    .digest('hex');
+}
+
+// LRU cache of program steps with a byte budget, optionally backed by a
+// directory with a byte budget of its own
+export class ResultCache {
+  private entries = new Map<string, { step: CachedStep; size: number }>();
+  private bytes = 0;
+  // Sizes of the files in the directory, least recently written or read first
+  private files?: Promise<Map<string, number>>;
+  private fileBytes = 0;
+
+  constructor(
+    private readonly maxBytes: number,
+    private readonly directory?: string,
+    private readonly maxDirectoryBytes = Infinity
+  ) {}
+
+  get enabled() {
+    return this.maxBytes > 0;
+  }
+
+  async get(key: string) {
+    const entry = this.entries.get(key);
+    if (entry) {
+      // Move to the most recently used end
+      this.entries.delete(key);
+      this.entries.set(key, entry);
+      return entry.step;
+    }
+
+    if (!this.directory) return undefined;
+
+    try {
+      const step: CachedStep = JSON.parse(await fs.promises.readFile(this.file(key), 'utf8'));
+      this.remember(key, step);
+      this.touchFile(key);
+      return step;
+    } catch {
+      return undefined;
+    }
+  }
+
+  set(key: string, step: CachedStep) {
+    this.remember(key, step);
+
+    if (this.directory) {
+      const body = JSON.stringify(step);
+      this.fileIndex()
+        .then(async (files) => {
+          await fs.promises.writeFile(this.file(key), body);
+          const size = Buffer.byteLength(body);
+          this.fileBytes += size - (files.get(key) ?? 0);
+          files.delete(key);
+          files.set(key, size);
+          await this.evictFiles(files);
+        })
+        .catch((error) => console.error('Failed to write execution cache:', error));
+    }
+  }
+
+  // Read the directory's contents once, oldest files first
+  private fileIndex() {
+    this.files ??= (async () => {
+      const directory = this.directory!;
+      await fs.promises.mkdir(directory, { recursive: true });
+
+      const found: Array<{ key: string; size: number; mtimeMs: number }> = [];
+      for (const name of await fs.promises.readdir(directory)) {
+        if (!name.endsWith('.json')) continue;
+        try {
+          const { size, mtimeMs } = await fs.promises.stat(path.join(directory, name));
+          found.push({ key: name.slice(0, -'.json'.length), size, mtimeMs });
+        } catch {
+          // Removed while we were looking
+        }
+      }
+
+      found.sort((a, b) => a.mtimeMs - b.mtimeMs);
+      this.fileBytes = found.reduce((total, file) => total + file.size, 0);
+      return new Map(found.map((file) => [file.key, file.size]));
+    })();
+    return this.files;
+  }
+
+  // Mark a file as recently used, here and (through its mtime) for the next server
+  private touchFile(key: string) {
+    this.fileIndex()
+      .then((files) => {
+        const size = files.get(key);
+        if (size === undefined) return;
+        files.delete(key);
+        files.set(key, size);
+        const now = new Date();
+        return fs.promises.utimes(this.file(key), now, now);
+      })
+      .catch(() => {});
+  }
+
+  // Delete least recently used files until the directory is back under budget
+  private async evictFiles(files: Map<string, number>) {
+    const evicted: string[] = [];
+    for (const [key, size] of files) {
+      if (this.fileBytes <= this.maxDirectoryBytes) break;
+      files.delete(key);
+      this.fileBytes -= size;
+      evicted.push(key);
+    }
+    await Promise.all(evicted.map((key) => fs.promises.unlink(this.file(key)).catch(() => {})));
+  }
+
+  private remember(key: string, step: CachedStep) {
+    const size = key.length + Buffer.byteLength(step.output);
+    if (size > this.maxBytes) return;
+
+    const existing = this.entries.get(key);
+    if (existing) {
+      this.entries.delete(key);
+      this.bytes -= existing.size;
+    }
+
+    this.entries.set(key, { step, size });
+    this.bytes += size;
+
+    // Evict least recently used entries until we're back under budget
+    for (const [oldestKey, oldest] of this.entries) {
+      if (this.bytes <= this.maxBytes) break;
+      this.entries.delete(oldestKey);
+      this.bytes -= oldest.size;
+    }
+  }
+
+  private file(key: string) {
+    return path.join(this.directory!, `${key}.json`);
+  }
+}
+
+// EXECUTE_CACHE_MB bounds the in-memory tier and EXECUTE_CACHE_DIR_MB the
+// files in EXECUTE_CACHE_DIR, if set
+export const resultCache = new ResultCache(
+  parseInt(process.env.EXECUTE_CACHE_MB || '64') * 1024 * 1024,
+  process.env.EXECUTE_CACHE_DIR || undefined,
+  parseInt(process.env.EXECUTE_CACHE_DIR_MB || '1024') * 1024 * 1024
+);
@@ -1,299 +1,219 @@
 import { NextRequest, NextResponse } from 'next/server';
-import { spawn } from 'child_process';
 import { v4 as uuidv4 } from 'uuid';
+import { canReadStats } from './metrics';
+import { outputBufferFull, Session, SessionLimitError, sessionManager } from './sessions';
+
+// How long a request waits for the program to ask for input or finish
+// before returning what it has so far. A response that is neither waiting for
+// input nor completed is followed up with POST { sessionId } to get the rest.
+const RESPONSE_TIMEOUT_MS = 10000;
+
+// Bytes a streaming response may queue before the program is paused
+const STREAM_HIGH_WATER_MARK = 64 * 1024;
+
+// Wait until the program asks for input, finishes, fills the output buffer
+// or the timeout passes
+function respond(sessionId: string, session: Session) {
+  return new Promise<NextResponse>((resolve) => {
+    const reply = () => {
+      clearTimeout(timer);
+      session.notify = undefined;
+
+      const output = session.output;
+      session.output = '';
+      session.worker?.resume();
+      if (session.completed) {
+        sessionManager.remove(sessionId);
+      }
 
-// Store active Python processes
-const activeProcesses = new Map();
+      resolve(NextResponse.json({
+        output,
+        sessionId,
+        waitingForInput: session.waitingForInput,
+        completed: session.completed,
+        ...(session.completed && { exitCode: session.exitCode }),
+        ...(session.completed && session.profile && { profile: session.profile })
+      }));
+    };
+
+    const timer = setTimeout(reply, RESPONSE_TIMEOUT_MS);
+    session.notify = reply;
+
+    if (session.waitingForInput || session.completed || outputBufferFull(session)) {
+      reply();
+    }
+  });
+}
 
-export async function POST(request: NextRequest) {
-  try {
-    const { code, input, sessionId } = await request.json();
+// Stream output as server-sent events until the program asks for input or finishes.
+//
+// Events: "session" ({ sessionId }), "output" ({ text }), then either
+// "input" ({ sessionId }) or "end" ({ sessionId, exitCode, profile? }).
+function streamResponse(sessionId: string, session: Session) {
+  const encoder = new TextEncoder();
+  let pending = '';
+  let flushScheduled = false;
+  // Set once the stream has ended or the client has gone; a flush may still be scheduled
+  let closed = false;
+
+  const detach = () => {
+    session.stream = undefined;
+    session.notify = undefined;
+    session.worker?.resume();
+  };
+
+  const body = new ReadableStream<Uint8Array>({
+    start(controller) {
+      const send = (event: string, data: object) => {
+        if (closed) return;
+        controller.enqueue(encoder.encode(`event: ${event}\ndata: ${JSON.stringify(data)}\n\n`));
+        // Backpressure: stop reading from Python until the client catches up
+        if ((controller.desiredSize ?? 1) <= 0) {
+          session.worker?.pause();
+        }
+      };
+
+      // Coalesce the output frames that arrive in the same tick into one event
+      const flush = () => {
+        flushScheduled = false;
+        if (pending) {
+          send('output', { text: pending });
+          pending = '';
+        }
+      };
+
+      const finish = () => {
+        if (closed) return;
+        detach();
+        flush();
+        if (session.completed) {
+          sessionManager.remove(sessionId);
+          send('end', { sessionId, exitCode: session.exitCode, profile: session.profile });
+        } else {
+          send('input', { sessionId });
+        }
+        closed = true;
+        controller.close();
+      };
+
+      send('session', { sessionId });
+      pending = session.output;
+      session.output = '';
+
+      session.stream = (text: string) => {
+        pending += text;
+        if (!flushScheduled) {
+          flushScheduled = true;
+          setImmediate(flush);
+        }
+      };
+      session.notify = finish;
 
-    if (!code && !input) {
-      return NextResponse.json({ error: 'Code or input required' }, { status: 400 });
+      if (session.waitingForInput || session.completed) {
+        finish();
+      } else {
+        flush();
+      }
+    },
+    pull() {
+      session.worker?.resume();
+    },
+    cancel() {
+      closed = true;
+      pending = '';
+      detach();
     }
-
-    // If this is input for an existing session
-    if (input && sessionId && activeProcesses.has(sessionId)) {
-      const processData = activeProcesses.get(sessionId);
-      const process = processData.process;
-      
-      // Send input to the process
-      process.stdin.write(input + '\n');
-      
-      // Return a promise that waits for new output
-      return new Promise<NextResponse>((resolve) => {
-        const startTime = Date.now();
-        let newOutput = '';
-        let hasNewOutput = false;
-        
-        // Create a temporary handler for this input cycle
-        const outputHandler = (data: Buffer) => {
-          const text = data.toString('utf8');
-          newOutput += text;
-          hasNewOutput = true;
-          
-          // Check if now waiting for more input
-          const lines = (newOutput || text).split('\n');
-          const lastLine = lines[lines.length - 1] || '';
-          const secondLastLine = lines[lines.length - 2] || '';
-          
-          // More comprehensive input detection
-          const inputIndicators = [
-            'How many',
-            'Enter',
-            'What is',
-            '?',
-            'choice = int(input())',
-            'input()',
-            'kannus = float(input())',
-            'liters = float(input())'
-          ];
-          
-          const hasInputIndicator = inputIndicators.some(indicator => 
-            text.includes(indicator) || 
-            lastLine.includes(indicator) || 
-            secondLastLine.includes(indicator)
-          );
-          
-          // Check for menu patterns
-          const hasMenuPattern = /\d+\)\s/.test(text) || /\d+\)\s/.test(newOutput);
-          const endsWithoutNewline = !text.endsWith('\n') && text.trim().length > 0;
-          
-          const isWaitingForInput = hasInputIndicator || endsWithoutNewline || 
-                                   (hasMenuPattern && (lastLine.trim() === '' || secondLastLine.trim() === ''));
-          
-          // If we detect input prompt, respond immediately
-          if (isWaitingForInput) {
-            process.stdout.removeListener('data', outputHandler);
-            process.stderr.removeListener('data', errorHandler);
-            
-            resolve(NextResponse.json({
-              output: newOutput,
-              sessionId: sessionId,
-              waitingForInput: true,
-              completed: false
-            }));
-          }
-        };
-        
-        const errorHandler = (data: Buffer) => {
-          newOutput += `Error: ${data.toString('utf8')}`;
-          hasNewOutput = true;
-        };
-        
-        // Add temporary listeners
-        process.stdout.on('data', outputHandler);
-        process.stderr.on('data', errorHandler);
-        
-        // Check periodically for output
-        const checkOutput = () => {
-          if (hasNewOutput) {
-            // Wait a bit more to see if there's additional output
-            setTimeout(() => {
-              process.stdout.removeListener('data', outputHandler);
-              process.stderr.removeListener('data', errorHandler);
-              
-              const lines = newOutput.split('\n');
-              const lastLine = lines[lines.length - 1] || '';
-              const secondLastLine = lines[lines.length - 2] || '';
-              
-              // More comprehensive input detection
-              const inputIndicators = [
-                'How many',
-                'Enter',
-                'What is',
-                '?',
-                'choice = int(input())',
-                'input()',
-                'kannus = float(input())',
-                'liters = float(input())'
-              ];
-              
-              const hasInputIndicator = inputIndicators.some(indicator => 
-                newOutput.includes(indicator) || 
-                lastLine.includes(indicator) || 
-                secondLastLine.includes(indicator)
-              );
-              
-              const hasMenuPattern = /\d+\)\s/.test(newOutput);
-              const endsWithoutNewline = newOutput.length > 0 && !newOutput.endsWith('\n');
-              
-              const isWaitingForInput = hasInputIndicator || endsWithoutNewline || 
-                                       (hasMenuPattern && (lastLine.trim() === '' || secondLastLine.trim() === ''));
-              
-              resolve(NextResponse.json({
-                output: newOutput,
-                sessionId: sessionId,
-                waitingForInput: isWaitingForInput,
-                completed: false
-              }));
-            }, 500);
-          } else if (Date.now() - startTime > 3000) {
-            // Timeout - assume program is done or waiting
-            process.stdout.removeListener('data', outputHandler);
-            process.stderr.removeListener('data', errorHandler);
-            
-            resolve(NextResponse.json({
-              output: newOutput || '',
-              sessionId: sessionId,
-              waitingForInput: false,
-              completed: true
-            }));
-          } else {
-            // Check again
-            setTimeout(checkOutput, 200);
-          }
-        };
-        
-        // Start checking after a short delay
-        setTimeout(checkOutput, 100);
-      });
+  }, {
+    highWaterMark: STREAM_HIGH_WATER_MARK,
+    size: (chunk: Uint8Array) => chunk.byteLength
+  });
+
+  return new Response(body, {
+    headers: {
+      'Content-Type': 'text/event-stream',
+      'Cache-Control': 'no-cache',
+      Connection: 'keep-alive'
     }
+  });
+}
 
-    // Start new Python execution
-    const newSessionId = uuidv4();
-    let isWaitingForInput = false;
-
-    // Create a temporary Python file
-    const tempCode = `
-import sys
-import os
-import io
+// Response for a session that could not get a Python process
+function startFailed(error: unknown) {
+  if (error instanceof SessionLimitError) {
+    return NextResponse.json({ error: error.message }, { status: 503, headers: { 'Retry-After': '5' } });
+  }
+  return NextResponse.json({
+    error: 'Python not found. Please make sure Python is installed and available in your system PATH.',
+    details: error instanceof Error ? error.message : 'Unknown error'
+  }, { status: 500 });
+}
 
-# Set up UTF-8 encoding for output
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
-sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+export async function POST(request: NextRequest) {
+  try {
+    const { code, input, sessionId, stream, profile } = await request.json();
 
-try:
-${code.split('\n').map((line: string) => '    ' + line).join('\n')}
-except Exception as e:
-    print(f"Error: {e}")
-finally:
-    print("\\n--- Execution completed ---")
-`;
+    if (!code && input === undefined && !sessionId) {
+      return NextResponse.json({ error: 'Code, input or sessionId required' }, { status: 400 });
+    }
 
-    return new Promise<NextResponse>((resolve) => {
-      let outputBuffer = '';
-      
-    const pythonProcess = spawn('python', ['-u', '-c', tempCode], {
-      stdio: ['pipe', 'pipe', 'pipe'],
-      env: { 
-        ...process.env, 
-        PYTHONIOENCODING: 'utf-8',
-        PYTHONUNBUFFERED: '1'
+    // Input for an existing session, or with just a sessionId, a request for the
+    // output it produced after the last response returned
+    if (sessionId && (input !== undefined || !code)) {
+      const session = sessionManager.get(sessionId);
+      if (!session) {
+        return NextResponse.json({ error: 'Session not found' }, { status: 404 });
       }
-    });      pythonProcess.on('error', (error) => {
-        activeProcesses.delete(newSessionId);
-        resolve(NextResponse.json({
-          error: 'Python not found. Please make sure Python is installed and available in your system PATH.',
-          details: error.message
-        }, { status: 500 }));
-        return;
-      });
 
-      // Store the process with metadata
-      activeProcesses.set(newSessionId, {
-        process: pythonProcess,
-        startTime: Date.now()
-      });
-      
-      pythonProcess.stdout.on('data', (data) => {
-        const text = data.toString('utf8');
-        outputBuffer += text;
-        
-        // Check if waiting for input - improved detection
-        const lines = outputBuffer.split('\n');
-        const lastLine = lines[lines.length - 1] || '';
-        const secondLastLine = lines[lines.length - 2] || '';
-        
-        // More comprehensive input detection
-        const inputIndicators = [
-          '?',
-          'How many',
-          'Enter',
-          'What is',
-          'choice = int(input())',
-          'input()',
-          'kannus = float(input())',
-          'liters = float(input())'
-        ];
-        
-        const hasInputIndicator = inputIndicators.some(indicator => 
-          text.includes(indicator) || 
-          lastLine.includes(indicator) || 
-          secondLastLine.includes(indicator)
-        );
-        
-        // Also check if the output ends without a newline (common for input prompts)
-        const endsWithoutNewline = !text.endsWith('\n') && text.trim().length > 0;
-        
-        // Check for menu patterns (numbers followed by closing parenthesis)
-        const hasMenuPattern = /\d+\)\s/.test(outputBuffer);
-        
-        if (hasInputIndicator || endsWithoutNewline || 
-            (hasMenuPattern && (lastLine.trim() === '' || secondLastLine.trim() === ''))) {
-          isWaitingForInput = true;
+      // Send input to the process (starting one if the session was replayed from the cache)
+      if (input !== undefined && !session.completed) {
+        try {
+          await sessionManager.input(sessionId, session, String(input));
+        } catch (error) {
+          return startFailed(error);
         }
-      });
-
-      pythonProcess.stderr.on('data', (data) => {
-        outputBuffer += `Error: ${data.toString('utf8')}`;
-      });
+      }
 
-      pythonProcess.on('close', (code) => {
-        activeProcesses.delete(newSessionId);
-        resolve(NextResponse.json({
-          output: outputBuffer,
-          sessionId: newSessionId,
-          completed: true,
-          exitCode: code
-        }));
-      });
+      return stream ? streamResponse(sessionId, session) : respond(sessionId, session);
+    }
 
-      // For interactive programs, return early if waiting for input
-      setTimeout(() => {
-        if (activeProcesses.has(newSessionId) && isWaitingForInput) {
-          resolve(NextResponse.json({
-            output: outputBuffer,
-            sessionId: newSessionId,
-            completed: false,
-            waitingForInput: true
-          }));
-        }
-      }, 2000);
+    // Start new Python execution on a warm worker, or replay it from the cache
+    const newSessionId = uuidv4();
+    let session: Session;
+    try {
+      session = await sessionManager.start(newSessionId, code, profile === true);
+    } catch (error) {
+      return startFailed(error);
+    }
 
-      // Final timeout for non-interactive programs
-      setTimeout(() => {
-        if (activeProcesses.has(newSessionId)) {
-          resolve(NextResponse.json({
-            output: outputBuffer,
-            sessionId: newSessionId,
-            completed: false,
-            waitingForInput: isWaitingForInput
-          }));
-        }
-      }, 10000);
-    });
+    return stream ? streamResponse(newSessionId, session) : respond(newSessionId, session);
 
   } catch (error) {
     console.error('Python execution error:', error);
-    return NextResponse.json({ 
+    return NextResponse.json({
       error: 'Failed to execute Python code',
       details: error instanceof Error ? error.message : 'Unknown error'
     }, { status: 500 });
   }
 }
 
+// Live session count and memory use of the running Python children
+export async function GET(request: NextRequest) {
+  if (!canReadStats(request)) {
+    return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
+  }
+
+  return NextResponse.json(sessionManager.stats(), {
+    headers: { 'Cache-Control': 'no-store' }
+  });
+}
+
 export async function DELETE(request: NextRequest) {
   try {
     const { searchParams } = new URL(request.url);
     const sessionId = searchParams.get('sessionId');
 
-    if (sessionId && activeProcesses.has(sessionId)) {
-      const processData = activeProcesses.get(sessionId);
-      processData.process.kill();
-      activeProcesses.delete(sessionId);
+    if (sessionId) {
+      sessionManager.kill(sessionId);
     }
 
     return NextResponse.json({ success: true });
@@ -0,0 +1,405 @@
+import fs from 'fs';
+import { puzzleLabel } from '../catalog';
+import { executeMetrics } from './metrics';
+import { ChildUsage, ProfileSummary, pythonPool, PythonWorker, SessionLimits } from './pythonPool';
+import { isDeterministic, resultCache, stepKey } from './resultCache';
+
+// Output kept for a JSON response before the program is paused until it is collected
+const MAX_BUFFERED_OUTPUT = 1024 * 1024;
+
+// Steps that print more than this are not cached
+const MAX_CACHED_STEP_OUTPUT = 256 * 1024;
+
+// How often idle sessions are looked for
+const REAPER_INTERVAL_MS = 15000;
+
+export interface Session {
+  code: string;
+  // Which puzzle this is, for metrics
+  puzzle: string;
+  // Python running this session; missing while it is being replayed from the cache
+  worker?: PythonWorker;
+  startTime: number;
+  // Last time the program produced output or the client talked to it
+  lastActivity: number;
+  // Output produced since the last response
+  output: string;
+  waitingForInput: boolean;
+  completed: boolean;
+  exitCode?: number;
+  // Wakes up the request currently waiting on this session
+  notify?: () => void;
+  // Set while a streaming response is attached; receives output as it arrives
+  stream?: (text: string) => void;
+  // Every line typed in so far
+  transcript: string[];
+  // Whether results of this program may be cached and replayed
+  cacheable: boolean;
+  // Everything printed since the last input, for the cache
+  stepOutput: string;
+  // Transcript lines still to be fed to a freshly started worker after a cache miss
+  replayRemaining: number;
+  // Whether the program runs under the profiler, and what it reported
+  profiling: boolean;
+  profile?: ProfileSummary;
+  // performance.now() when the program was sent to a worker, until its first output
+  firstOutputFrom?: number;
+  // performance.now() when the last line of input was sent, until the program answers
+  inputSentAt?: number;
+}
+
+interface SessionManagerOptions {
+  // Sessions allowed to run at the same time
+  maxSessions: number;
+  // New sessions allowed to wait for a free slot
+  maxQueued: number;
+  queueTimeoutMs: number;
+  // Sessions nobody has talked to for this long are killed
+  idleTimeoutMs: number;
+  limits: SessionLimits;
+}
+
+// Thrown when a session can't be started because the server is at capacity
+export class SessionLimitError extends Error {}
+
+// Whether a session has buffered as much output as a JSON response holds;
+// its program stays paused until a request collects it
+export function outputBufferFull(session: Session) {
+  return session.output.length > MAX_BUFFERED_OUTPUT;
+}
+
+// Resident memory of a process in bytes, or 0 where /proc is not available
+function readRss(pid?: number) {
+  if (!pid) return 0;
+  try {
+    const status = fs.readFileSync(`/proc/${pid}/status`, 'utf8');
+    const match = /^VmRSS:\s+(\d+) kB/m.exec(status);
+    return match ? parseInt(match[1]) * 1024 : 0;
+  } catch {
+    return 0;
+  }
+}
+
+// Owns every running Python session: caps how many run at once, queues the
+// rest, replays deterministic programs from the cache and kills sessions that
+// have been abandoned
+export class SessionManager {
+  private sessions = new Map<string, Session>();
+  // Slots taken, including sessions still waiting for a worker
+  private running = 0;
+  private queue: Array<() => void> = [];
+  private reaper?: NodeJS.Timeout;
+
+  constructor(private readonly options: SessionManagerOptions) {}
+
+  get(sessionId: string) {
+    const session = this.sessions.get(sessionId);
+    if (session) {
+      session.lastActivity = Date.now();
+    }
+    return session;
+  }
+
+  async start(sessionId: string, code: string, profiling = false) {
+    const session: Session = {
+      code,
+      puzzle: puzzleLabel(code),
+      startTime: Date.now(),
+      lastActivity: Date.now(),
+      output: '',
+      waitingForInput: false,
+      completed: false,
+      transcript: [],
+      // A replayed run has nothing to profile
+      cacheable: resultCache.enabled && !profiling && isDeterministic(code),
+      stepOutput: '',
+      replayRemaining: 0,
+      profiling
+    };
+
+    if (await this.replayStep(session)) {
+      executeMetrics.sessions.inc({ puzzle: session.puzzle, source: 'cache' });
+      if (!session.completed) {
+        this.sessions.set(sessionId, session);
+        this.startReaper();
+      }
+      return session;
+    }
+
+    executeMetrics.sessions.inc({ puzzle: session.puzzle, source: 'python' });
+    await this.attachWorker(sessionId, session);
+    return session;
+  }
+
+  // Send one line of input to a session
+  async input(sessionId: string, session: Session, input: string) {
+    session.waitingForInput = false;
+    session.transcript.push(input);
+
+    if (session.worker) {
+      session.stepOutput = '';
+      session.inputSentAt = performance.now();
+      session.worker.write(input);
+      return;
+    }
+
+    if (await this.replayStep(session)) {
+      if (session.completed) {
+        this.sessions.delete(sessionId);
+      }
+      return;
+    }
+
+    // Cache miss part-way through: start Python and fast-forward it through the transcript
+    session.replayRemaining = session.transcript.length;
+    try {
+      await this.attachWorker(sessionId, session);
+    } catch (error) {
+      // Leave the session as it was, so the client can retry the same line
+      session.transcript.pop();
+      session.replayRemaining = 0;
+      session.waitingForInput = true;
+      throw error;
+    }
+  }
+
+  // Forget a finished session once its last output has been sent
+  remove(sessionId: string) {
+    this.sessions.delete(sessionId);
+  }
+
+  kill(sessionId: string) {
+    const session = this.sessions.get(sessionId);
+    if (session?.worker) {
+      session.worker.kill();
+    } else {
+      this.sessions.delete(sessionId);
+    }
+  }
+
+  stats() {
+    const now = Date.now();
+    // No session ids: an id is all it takes to read, type into or kill a session
+    const sessions = [...this.sessions.values()].map((session) => ({
+      ageMs: now - session.startTime,
+      idleMs: now - session.lastActivity,
+      waitingForInput: session.waitingForInput,
+      completed: session.completed,
+      replayed: !session.worker && !session.completed,
+      rssBytes: readRss(session.worker?.sessionPid)
+    }));
+
+    return {
+      active: sessions.filter((session) => !session.replayed && !session.completed).length,
+      replayed: sessions.filter((session) => session.replayed).length,
+      queued: this.queue.length,
+      maxSessions: this.options.maxSessions,
+      rssBytes: sessions.reduce((total, session) => total + session.rssBytes, 0),
+      sessions
+    };
+  }
+
+  // Serve the session's next step from the cache, if we have it
+  private async replayStep(session: Session) {
+    if (!session.cacheable || !pythonPool.pythonVersion) return false;
+
+    const step = await resultCache.get(stepKey(pythonPool.pythonVersion, session.code, session.transcript));
+    executeMetrics.cacheSteps.inc({ result: step ? 'hit' : 'miss' });
+    if (!step) return false;
+
+    session.output += step.output;
+    session.completed = step.completed;
+    session.exitCode = step.exitCode;
+    session.waitingForInput = !step.completed;
+    return true;
+  }
+
+  private recordStep(session: Session) {
+    if (!session.cacheable || !pythonPool.pythonVersion || session.stepOutput.length > MAX_CACHED_STEP_OUTPUT) return;
+
+    resultCache.set(stepKey(pythonPool.pythonVersion, session.code, session.transcript), {
+      output: session.stepOutput,
+      completed: session.completed,
+      exitCode: session.exitCode
+    });
+  }
+
+  private async attachWorker(sessionId: string, session: Session) {
+    await this.acquireSlot();
+
+    let worker: PythonWorker;
+    try {
+      worker = await pythonPool.acquire();
+    } catch (error) {
+      this.releaseSlot();
+      throw error;
+    }
+
+    session.worker = worker;
+    this.sessions.set(sessionId, session);
+    this.startReaper();
+
+    const labels = { puzzle: session.puzzle };
+    // Seconds since a performance.now() timestamp
+    const since = (start: number) => (performance.now() - start) / 1000;
+
+    // The program answered the last line of input
+    const answered = () => {
+      if (session.inputSentAt !== undefined) {
+        executeMetrics.promptRoundTrip.observe(labels, since(session.inputSentAt));
+        session.inputSentAt = undefined;
+      }
+    };
+
+    const collect = (text: string) => {
+      session.lastActivity = Date.now();
+
+      // Output of the steps the client has already seen
+      if (session.replayRemaining > 0) return;
+
+      if (session.firstOutputFrom !== undefined) {
+        executeMetrics.firstOutput.observe(labels, since(session.firstOutputFrom));
+        session.firstOutputFrom = undefined;
+      }
+
+      if (session.cacheable && session.stepOutput.length <= MAX_CACHED_STEP_OUTPUT) {
+        session.stepOutput += text;
+      }
+
+      if (session.stream) {
+        session.stream(text);
+        return;
+      }
+
+      session.output += text;
+      if (outputBufferFull(session)) {
+        // Hand what we have to the waiting request instead of buffering more;
+        // without one, the next request for this session collects it
+        worker.pause();
+        session.notify?.();
+      }
+    };
+
+    worker.on('output', collect);
+
+    worker.on('errorOutput', (text: string) => {
+      collect(`Error: ${text}`);
+    });
+
+    // The worker tells us explicitly when input() is called, so we can answer right away
+    worker.on('inputRequest', () => {
+      if (session.replayRemaining > 0) {
+        worker.write(session.transcript[session.transcript.length - session.replayRemaining]);
+        session.replayRemaining--;
+        return;
+      }
+
+      answered();
+      session.waitingForInput = true;
+      this.recordStep(session);
+      session.notify?.();
+    });
+
+    worker.on('profile', (summary: ProfileSummary) => {
+      session.profile = summary;
+    });
+
+    worker.on('sessionEnd', (exitCode: number, usage?: ChildUsage) => {
+      answered();
+      executeMetrics.sessionDuration.observe(labels, (Date.now() - session.startTime) / 1000);
+      executeMetrics.exits.inc({ ...labels, exit_code: String(exitCode) });
+      if (usage) {
+        executeMetrics.childCpu.inc({ ...labels, mode: 'user' }, usage.userSeconds);
+        executeMetrics.childCpu.inc({ ...labels, mode: 'system' }, usage.systemSeconds);
+        executeMetrics.childMaxRss.observe(labels, usage.maxRssBytes);
+      }
+
+      session.completed = true;
+      session.exitCode = exitCode;
+      // Killed or out of resources: not a result worth replaying
+      if (exitCode >= 0) {
+        this.recordStep(session);
+      }
+      // Kept until a request has collected the last output (see remove())
+      session.worker = undefined;
+      pythonPool.release(worker);
+      this.releaseSlot();
+      session.notify?.();
+    });
+
+    const runStartedAt = performance.now();
+    worker.on('sessionSpawn', () => {
+      executeMetrics.sessionSpawn.observe({}, since(runStartedAt));
+    });
+
+    // A session resumed after a cache miss has already shown its first output
+    session.firstOutputFrom = session.transcript.length === 0 ? runStartedAt : undefined;
+    worker.run(session.code, this.options.limits, session.profiling);
+  }
+
+  private acquireSlot() {
+    if (this.running < this.options.maxSessions) {
+      this.running++;
+      return Promise.resolve();
+    }
+
+    if (this.queue.length >= this.options.maxQueued) {
+      executeMetrics.rejected.inc({ reason: 'queue_full' });
+      return Promise.reject(new SessionLimitError('Too many programs are running right now. Please try again shortly.'));
+    }
+
+    return new Promise<void>((resolve, reject) => {
+      const waiter = () => {
+        clearTimeout(timer);
+        resolve();
+      };
+
+      const timer = setTimeout(() => {
+        this.queue = this.queue.filter((w) => w !== waiter);
+        executeMetrics.rejected.inc({ reason: 'queue_timeout' });
+        reject(new SessionLimitError('Timed out waiting for a free Python slot. Please try again shortly.'));
+      }, this.options.queueTimeoutMs);
+
+      this.queue.push(waiter);
+    });
+  }
+
+  private releaseSlot() {
+    const next = this.queue.shift();
+    if (next) {
+      // Hand the slot straight to the next queued session
+      next();
+    } else {
+      this.running--;
+    }
+  }
+
+  private startReaper() {
+    if (this.reaper) return;
+
+    this.reaper = setInterval(() => {
+      const cutoff = Date.now() - this.options.idleTimeoutMs;
+      for (const [sessionId, session] of this.sessions) {
+        if (session.lastActivity < cutoff) {
+          if (!session.completed) {
+            executeMetrics.idleKilled.inc({ puzzle: session.puzzle });
+          }
+          this.kill(sessionId);
+        }
+      }
+    }, REAPER_INTERVAL_MS);
+    // Don't keep the server alive just for the reaper
+    this.reaper.unref();
+  }
+}
+
+export const sessionManager = new SessionManager({
+  maxSessions: parseInt(process.env.EXECUTE_MAX_SESSIONS || '100'),
+  maxQueued: parseInt(process.env.EXECUTE_MAX_QUEUED || '100'),
+  queueTimeoutMs: parseInt(process.env.EXECUTE_QUEUE_TIMEOUT_MS || '15000'),
+  idleTimeoutMs: parseInt(process.env.EXECUTE_IDLE_TIMEOUT_MS || '300000'),
+  limits: {
+    cpuSeconds: parseInt(process.env.PYTHON_CPU_SECONDS || '10'),
+    memoryBytes: parseInt(process.env.PYTHON_MEMORY_MB || '256') * 1024 * 1024
+  }
+});
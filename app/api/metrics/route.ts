@@ -0,0 +1,26 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { canReadStats, gauge, renderMetrics } from '../execute/metrics';
+import { sessionManager } from '../execute/sessions';
+
+// Execute API metrics in the Prometheus text format
+export async function GET(request: NextRequest) {
+  if (!canReadStats(request)) {
+    return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
+  }
+
+  const stats = sessionManager.stats();
+  const body = renderMetrics([
+    gauge('puzzle_execute_active_sessions', 'Sessions running on Python.', stats.active),
+    gauge('puzzle_execute_replayed_sessions', 'Sessions being replayed from the cache.', stats.replayed),
+    gauge('puzzle_execute_queued_sessions', 'Sessions waiting for a free slot.', stats.queued),
+    gauge('puzzle_execute_max_sessions', 'Sessions allowed to run at the same time.', stats.maxSessions),
+    gauge('puzzle_execute_session_rss_bytes', 'Resident memory of the running Python children.', stats.rssBytes)
+  ]);
+
+  return new NextResponse(body, {
+    headers: {
+      'Content-Type': 'text/plain; version=0.0.4; charset=utf-8',
+      'Cache-Control': 'no-store'
+    }
+  });
+}
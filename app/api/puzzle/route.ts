@@ -1,6 +1,8 @@
-import fs from "fs";
-import path from "path";
 import { NextRequest, NextResponse } from "next/server";
+import { CachedBody, cachedBody, findPuzzle, respondCached } from "../catalog";
+
+// Response bodies by "round/filename", built on first request
+const responses = new Map<string, CachedBody>();
 
 export async function GET(request: NextRequest) {
   const { searchParams } = new URL(request.url);
@@ -16,14 +18,17 @@ export async function GET(request: NextRequest) {
     return NextResponse.json({ error: 'Invalid round number' }, { status: 404 });
   }
 
-  const filePath = path.join(process.cwd(), "public", `Round ${roundNumber}`, `${puzzleName}.py`);
-  
-  if (!fs.existsSync(filePath)) {
+  const key = `${roundNumber}/${puzzleName}`;
+  const cached = responses.get(key);
+  if (cached) {
+    return respondCached(request, cached);
+  }
+
+  const puzzle = findPuzzle(roundNumber, puzzleName);
+  if (!puzzle) {
     return NextResponse.json({ error: 'Puzzle not found' }, { status: 404 });
   }
 
-  const code = fs.readFileSync(filePath, 'utf-8');
-  
   const roundInfo = {
     1: { difficulty: "Beginner", color: "bg-green-500", roundTitle: "Round 1: Getting Started" },
     2: { difficulty: "Easy", color: "bg-blue-500", roundTitle: "Round 2: Basic Logic" },
@@ -33,51 +38,19 @@ export async function GET(request: NextRequest) {
     6: { difficulty: "Legendary", color: "bg-purple-500", roundTitle: "Round 6: Master Level" }
   }[roundNumber];
 
-  // Generate description based on puzzle name
-  const generateDescription = (name: string) => {
-    const formattedName = name.replace(/_/g, ' ').replace(/\b\w/g, l => l.toUpperCase());
-    
-    if (name.includes('battery')) {
-      return "Calculate charging speed and time remaining for a device battery based on charging data.";
-    } else if (name.includes('first')) {
-      return "A simple introduction to Python programming - your first step into the coding world.";
-    } else if (name.includes('potato')) {
-      return "Solve the famous potato paradox - a mathematical puzzle about water content and weight.";
-    } else if (name.includes('scooter')) {
-      return "Analyze electric scooter performance and calculate optimal usage patterns.";
-    } else if (name.includes('lamp')) {
-      return "Diagnose lighting system problems and determine the correct troubleshooting steps.";
-    } else if (name.includes('map')) {
-      return "Scale map coordinates and calculate distances between geographical points.";
-    } else if (name.includes('sweater')) {
-      return "Help Sakari choose the perfect sweater based on weather conditions and preferences.";
-    } else if (name.includes('matrix')) {
-      return "Work with 2D matrices to find local maxima and perform matrix transformations.";
-    } else if (name.includes('triangle')) {
-      return "Determine triangle properties and classify triangles based on their side lengths.";
-    } else if (name.includes('fruit')) {
-      return "Simulate a fruit machine and calculate probabilities of winning combinations.";
-    } else if (name.includes('basketball')) {
-      return "Analyze basketball game statistics and calculate team performance metrics.";
-    } else if (name.includes('salary')) {
-      return "Process salary data and generate comprehensive statistics for payroll analysis.";
-    } else {
-      return `A challenging ${formattedName.toLowerCase()} puzzle that will test your Python programming skills and problem-solving abilities.`;
-    }
-  };
-
   const puzzleData = {
-    name: puzzleName.replace(/_/g, ' ').replace(/\b\w/g, l => l.toUpperCase()),
-    code,
+    name: puzzle.name,
+    code: puzzle.code,
     roundNumber,
-    description: generateDescription(puzzleName),
+    description: puzzle.description,
+    functions: puzzle.functions,
+    inputSites: puzzle.inputSites,
+    seedsRandom: puzzle.seedsRandom,
+    interactive: puzzle.interactive,
     ...roundInfo!
   };
 
-  const response = NextResponse.json(puzzleData);
-  
-  // Add caching headers for better performance
-  response.headers.set('Cache-Control', 'public, s-maxage=3600, stale-while-revalidate=86400');
-  
-  return response;
+  const response = cachedBody(puzzleData);
+  responses.set(key, response);
+  return respondCached(request, response);
 }
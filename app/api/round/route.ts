@@ -1,6 +1,5 @@
-import fs from "fs";
-import path from "path";
 import { NextRequest, NextResponse } from "next/server";
+import { CachedBody, cachedBody, respondCached, roundPuzzles } from "../catalog";
 
 interface Puzzle {
   name: string;
@@ -17,6 +16,9 @@ interface RoundData {
   roundNumber: number;
 }
 
+// Response bodies by round number, built on first request
+const responses = new Map<number, CachedBody>();
+
 export async function GET(request: NextRequest) {
   const { searchParams } = new URL(request.url);
   const roundId = searchParams.get('id');
@@ -30,17 +32,19 @@ export async function GET(request: NextRequest) {
     return NextResponse.json({ error: 'Invalid round number' }, { status: 404 });
   }
 
-  const roundPath = path.join(process.cwd(), "public", `Round ${roundNumber}`);
-  
-  if (!fs.existsSync(roundPath)) {
+  const cached = responses.get(roundNumber);
+  if (cached) {
+    return respondCached(request, cached);
+  }
+
+  const catalogPuzzles = roundPuzzles(roundNumber);
+  if (!catalogPuzzles) {
     return NextResponse.json({ error: 'Round not found' }, { status: 404 });
   }
 
-  const files = fs.readdirSync(roundPath).filter((file: string) => file.endsWith('.py'));
-  
-  const puzzles: Puzzle[] = files.map((file: string) => ({
-    name: file.replace('.py', '').replace(/_/g, ' ').replace(/\b\w/g, (l: string) => l.toUpperCase()),
-    filename: file.replace('.py', ''),
+  const puzzles: Puzzle[] = catalogPuzzles.map((puzzle) => ({
+    name: puzzle.name,
+    filename: puzzle.filename,
     description: `A challenging Python puzzle that tests your programming skills.`
   }));
 
@@ -62,10 +66,7 @@ export async function GET(request: NextRequest) {
     roundNumber
   };
 
-  const response = NextResponse.json(roundData);
-  
-  // Add caching headers for better performance
-  response.headers.set('Cache-Control', 'public, s-maxage=3600, stale-while-revalidate=86400');
-  
-  return response;
+  const response = cachedBody(roundData);
+  responses.set(roundNumber, response);
+  return respondCached(request, response);
 }
@@ -41,17 +41,36 @@ export default function PyodideTerminal({ code, className = "" }: PyodideTermina
   const terminalRef = useRef<HTMLDivElement>(null);
   const waitingForInputResolveRef = useRef<((value: string) => void) | null>(null);
   const inputStartRef = useRef(0);
+  // Output waiting for the next animation frame to be added to the terminal
+  const pendingOutputRef = useRef("");
+  const outputFrameRef = useRef<number | null>(null);
+
+  // Add the pending output to the terminal in one DOM update
+  const flushOutput = () => {
+    if (outputFrameRef.current !== null) {
+      cancelAnimationFrame(outputFrameRef.current);
+      outputFrameRef.current = null;
+    }
+    const text = pendingOutputRef.current;
+    pendingOutputRef.current = "";
+    if (text && terminalRef.current) {
+      // Appending a text node doesn't re-serialise everything already printed
+      terminalRef.current.append(text);
+      terminalRef.current.scrollTop = terminalRef.current.scrollHeight;
+      inputStartRef.current = terminalRef.current.innerText.length;
+    }
+  };
 
   const writeOutput = (text: string) => {
-    if (terminalRef.current) {
-  terminalRef.current.innerText += text;
-  terminalRef.current.scrollTop = terminalRef.current.scrollHeight;
-  inputStartRef.current = terminalRef.current.innerText.length;
+    pendingOutputRef.current += text;
+    if (outputFrameRef.current === null) {
+      outputFrameRef.current = requestAnimationFrame(flushOutput);
     }
   };
 
   const customInput = async (prompt = ""): Promise<string> => {
     if (prompt) writeOutput(prompt);
+    flushOutput();
     return new Promise<string>((resolve) => {
       waitingForInputResolveRef.current = resolve;
   setIsWaitingForInput(true);
@@ -189,21 +208,56 @@ class SyncInput:
         self.waiting = False
         return self.result
 
+# Collects output in a fixed-size buffer and hands it to the page in one call
+# when the buffer fills up, before input() and when the program ends. The
+# page can't repaint while Python is running anyway, so printing cell by cell
+# no longer crosses into JavaScript (and touches the DOM) for every call.
+class TerminalOutput:
+    def __init__(self, write, size=64 * 1024):
+        self._write = write
+        self.buffer = bytearray(size)
+        self.length = 0
+
+    def write(self, text):
+        data = text.encode('utf-8')
+        if self.length + len(data) > len(self.buffer):
+            self.flush()
+            if len(data) > len(self.buffer):
+                self._write(text)
+                return
+        self.buffer[self.length:self.length + len(data)] = data
+        self.length += len(data)
+
+    def flush(self):
+        if self.length:
+            self._write(self.buffer[:self.length].decode('utf-8'))
+            self.length = 0
+
+terminal_output = TerminalOutput(js_writeOutput)
+
+class BufferedSyncInput(SyncInput):
+    def __call__(self, prompt=""):
+        terminal_output.flush()
+        return super().__call__(prompt)
+
 # Override input with our synchronous wrapper
-sync_input = SyncInput(js_input)
+sync_input = BufferedSyncInput(js_input)
 builtins.input = sync_input
 
 def print(*args, **kwargs):
   sep = kwargs.get('sep', ' ')
   end = kwargs.get('end', '\\n')
   s = sep.join(map(str, args))
-  js_writeOutput(s + end)
+  terminal_output.write(s + end)
 
 builtins.print = print
 
 # Execute the user code directly without any async wrapping
 user_code = textwrap.dedent(pyodide_user_code)
-exec(user_code, globals())
+try:
+    exec(user_code, globals())
+finally:
+    terminal_output.flush()
       `);
       
     } catch (error) {
@@ -211,8 +265,10 @@ exec(user_code, globals())
     } finally {
       setIsExecuting(false);
       writeOutput("\n--- Execution completed ---");
+      flushOutput();
     }
   };  const clearTerminal = () => {
+    pendingOutputRef.current = "";
     if (terminalRef.current) {
       terminalRef.current.innerText = "";
       inputStartRef.current = 0;
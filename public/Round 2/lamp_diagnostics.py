@@ -1,27 +1,22 @@
-def main():
-    print('-- Lamp diagnostics --')
-    print('Is the lamp switched on? (yes=1, no=0)')
-    switched_on = int(input())
-
-    if switched_on == 0:
-        print('Switch on the lamp.')
-        return
+DIAGNOSTIC_STEPS = [
+    ('Is the lamp switched on? (yes=1, no=0)', 'Switch on the lamp.'),
+    ('Is the lamp plugged in? (yes=1, no=0)', 'Plug the lamp into an outlet.'),
+    ('Do other electrical devices work in the room? (yes=1, no=0)', 'Check the breaker.'),
+]
 
+UNKNOWN_FAULT = "The lamp should work, but I don't know why it doesn't..."
 
-    print('Is the lamp plugged in? (yes=1, no=0)')
-    plugged_in = int(input())
-
-    if plugged_in == 0:
-        print('Plug the lamp into an outlet.')
-        return
+def main():
+    print('-- Lamp diagnostics --')
 
-    print('Do other electrical devices work in the room? (yes=1, no=0)')
-    other_devices_working = int(input())
+    for question, fix in DIAGNOSTIC_STEPS:
+        print(question)
+        answer = int(input())
 
-    if other_devices_working == 0:
-        print('Check the breaker.')
-        return
+        if answer == 0:
+            print(fix)
+            return
 
-    print("The lamp should work, but I don't know why it doesn't...")
+    print(UNKNOWN_FAULT)
 
 main()
\ No newline at end of file
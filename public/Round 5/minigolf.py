@@ -1,8 +1,8 @@
 PARS = [1, 2, 3, 4, 2, 3, 5, 3, 2]
 
-strokes = []
-
 def main():
+    strokes = []
+
     print('The pars for the holes are:')
     for i, par in enumerate(PARS):
         print(f'HOLE {i + 1}: {par}')
@@ -0,0 +1,149 @@
+"""Fleet-wide charge-time estimates.
+
+Applies the formulas from ``public/Round 1/battery.py`` to whole arrays of
+per-device readings at once:
+
+    charging_speed = percentage / minutes
+    minutes_until_full = (100 - current_percentage) / charging_speed
+
+Readings with no elapsed time or no charge gained have no usable rate; those
+devices get NaN instead of raising ZeroDivisionError. ``RollingRateEstimator``
+keeps a smoothed per-device rate that is updated incrementally as telemetry
+streams in, and drops it once a device stops charging.
+
+Run it directly to benchmark one ingest cycle:
+
+    python scripts/battery_fleet.py --devices 500000
+"""
+import argparse
+import math
+import random
+import time
+from array import array
+
+NAN = math.nan
+
+
+def _speed(minutes, percentage):
+    return percentage / minutes if minutes > 0 and percentage > 0 else NAN
+
+
+def _sample_speed(minutes, percentage):
+    if minutes <= 0:
+        return NAN
+    # No charge gained (or charge lost) over the interval: the device is not charging
+    return percentage / minutes if percentage > 0 else 0.0
+
+
+def _until_full(current_percentage, speed):
+    # NaN compares false, so devices without a rate stay NaN.
+    return (100 - current_percentage) / speed if speed > 0 else NAN
+
+
+def charging_speeds(minutes, percentages):
+    """Charging speed (%/min) for each reading, NaN where it is undefined."""
+    if len(minutes) != len(percentages):
+        raise ValueError('minutes and percentages must have the same length')
+    return array('d', map(_speed, minutes, percentages))
+
+
+def minutes_until_full(current_percentages, speeds):
+    """Minutes until each device is full, NaN where the speed is unusable."""
+    if len(current_percentages) != len(speeds):
+        raise ValueError('current_percentages and speeds must have the same length')
+    return array('d', map(_until_full, current_percentages, speeds))
+
+
+def estimate(minutes, percentages, current_percentages):
+    """Return ``(charging_speeds, minutes_until_full)`` for a batch of readings."""
+    speeds = charging_speeds(minutes, percentages)
+    return speeds, minutes_until_full(current_percentages, speeds)
+
+
+class RollingRateEstimator:
+    """Exponentially smoothed charging speed per device.
+
+    Devices are addressed by a dense integer index. Each sample updates the
+    device's rate in O(1). Samples with no elapsed time are ignored. Samples
+    with no charge gained count as speed 0 and pull the rate down, and after
+    ``stale_after`` of them in a row the device is treated as unplugged: its
+    rate drops to 0, so it has no time-to-full until it charges again.
+    """
+
+    def __init__(self, devices, smoothing=0.2, stale_after=3):
+        if not 0 < smoothing <= 1:
+            raise ValueError('smoothing must be in (0, 1]')
+        if stale_after < 1:
+            raise ValueError('stale_after must be at least 1')
+        self.smoothing = smoothing
+        self.stale_after = stale_after
+        self.rates = array('d', [NAN]) * devices
+        self.samples = array('q', [0]) * devices
+        # Samples in a row without any charge gained
+        self.idle = array('q', [0]) * devices
+
+    def update(self, devices, minutes, percentages):
+        """Fold one batch of ``(device, minutes, percentage)`` samples in."""
+        rates = self.rates
+        samples = self.samples
+        idle = self.idle
+        alpha = self.smoothing
+        stale_after = self.stale_after
+        for device, speed in zip(devices, map(_sample_speed, minutes, percentages)):
+            if speed != speed:
+                continue
+            samples[device] += 1
+            if speed > 0:
+                idle[device] = 0
+            else:
+                idle[device] += 1
+                if idle[device] >= stale_after:
+                    rates[device] = 0.0
+                    continue
+            # NaN and 0 compare false: the first rate after a stale spell starts afresh
+            if rates[device] > 0:
+                rates[device] += alpha * (speed - rates[device])
+            else:
+                rates[device] = speed
+
+    def minutes_until_full(self, devices, current_percentages):
+        rates = self.rates
+        return array('d', map(_until_full, current_percentages, (rates[device] for device in devices)))
+
+
+def benchmark(devices, cycles=3, seed=0):
+    rng = random.Random(seed)
+    ids = array('q', range(devices))
+    minutes = array('q', (rng.choice((0, 1, 1, 1, 2)) for _ in ids))
+    percentages = array('q', (rng.randint(0, 3) for _ in ids))
+    current = array('q', (rng.randint(0, 100) for _ in ids))
+    estimator = RollingRateEstimator(devices)
+
+    for cycle in range(cycles):
+        started = time.perf_counter()
+        speeds, until_full = estimate(minutes, percentages, current)
+        batch = time.perf_counter() - started
+
+        started = time.perf_counter()
+        estimator.update(ids, minutes, percentages)
+        rolling = estimator.minutes_until_full(ids, current)
+        streamed = time.perf_counter() - started
+
+        usable = sum(1 for value in until_full if value == value)
+        print(f'cycle {cycle + 1}: batch {devices / batch:>10.0f} readings/s, '
+              f'rolling {devices / streamed:>10.0f} readings/s, '
+              f'{usable} of {devices} devices with an estimate')
+    return speeds, until_full, rolling
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--devices', type=int, default=500_000)
+    parser.add_argument('--cycles', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    benchmark(args.devices, args.cycles, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+"""Scaled benchmarks for the puzzle algorithms.
+
+Each benchmark loads its puzzle with ``puzzle_loader.load_puzzle`` (so the
+interactive ``main()`` never runs), times the function at geometrically
+growing input sizes and fits the timings against the usual complexity
+classes. Results can be written as JSON and compared with a stored baseline:
+
+    python scripts/benchmarks.py --output baseline.json
+    python scripts/benchmarks.py --compare baseline.json
+
+A comparison fails (exit status 1) when a benchmark moves to a worse
+complexity class, e.g. an O(n) path turning into O(n**2). Wall times are
+only compared with ``--tolerance``: each benchmark also times a fixed
+calibration loop, and fails if, relative to that loop, it got more than the
+tolerance slower at the largest size measured by both runs. Benchmarks that
+take less than ``MIN_COMPARABLE_SECONDS`` per call there are skipped, since
+their timings are mostly noise.
+"""
+import argparse
+import contextlib
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+from functools import lru_cache
+
+from puzzle_loader import load_puzzle, puzzle_path
+
+# Complexity classes from best to worst, as (name, growth function)
+COMPLEXITIES = [
+    ('O(1)', lambda n: 1.0),
+    ('O(log n)', lambda n: math.log2(n)),
+    ('O(n)', lambda n: n),
+    ('O(n log n)', lambda n: n * math.log2(n)),
+    ('O(n^2)', lambda n: n * n),
+    ('O(n^3)', lambda n: n ** 3),
+]
+
+# How much the log-log slope has to grow before a worse fit counts as a regression
+MIN_EXPONENT_CHANGE = 0.25
+
+# Per-call times below this are too noisy to compare between runs
+MIN_COMPARABLE_SECONDS = 1e-5
+
+
+@lru_cache(maxsize=None)
+def puzzle(round_number, name):
+    return load_puzzle(puzzle_path(round_number, name))
+
+
+def _numbers(n, rng):
+    return [rng.uniform(-20.0, 40.0) for _ in range(n)]
+
+
+def _square_matrix(n, rng):
+    # n is the number of cells
+    side = max(3, math.isqrt(n))
+    return [[rng.randint(10, 99) for _ in range(side)] for _ in range(side)]
+
+
+def _cipher_text(n, rng):
+    cryptogram = puzzle(6, 'cryptogram')
+    sentences = ' '.join(cryptogram.SENTENCES).upper()
+    text = (sentences * (n // len(sentences) + 1))[:n]
+    cipher, _ = cryptogram.create_cipher(text)
+    # Leave a few letters out of the cipher so the '_' branch is exercised too
+    for letter in list(cipher)[:3]:
+        del cipher[letter]
+    return text, cipher
+
+
+def _move_bunny_calls(bunny, throws):
+    position = [bunny.OUT_OF_BOUND, bunny.OUT_OF_BOUND]
+    for throw in throws:
+        position = bunny.move_bunny(position, throw)
+        if position == [bunny.MIDDLE, bunny.MIDDLE]:
+            position = [bunny.OUT_OF_BOUND, bunny.OUT_OF_BOUND]
+
+
+def _determine_reward_calls(machine, spins):
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        coins = 0
+        for fruits in spins:
+            coins = machine.determine_reward(coins, *fruits)
+
+
+# name -> (make the input for size n, run the function on that input)
+BENCHMARKS = {
+    'moving_average': (
+        _numbers,
+        lambda data: puzzle(5, 'medication_temperature').moving_average(data, 10),
+    ),
+    'moving_average_wide_window': (
+        _numbers,
+        lambda data: puzzle(5, 'medication_temperature').moving_average(data, len(data) // 4),
+    ),
+    'calculate_standard_deviation': (
+        _numbers,
+        lambda data: puzzle(5, 'salary_statistics').calculate_standard_deviation(data),
+    ),
+    'find_list_of_local_max': (
+        _square_matrix,
+        lambda matrix: puzzle(6, 'matrix').find_list_of_local_max(matrix),
+    ),
+    'apply_cipher': (
+        _cipher_text,
+        lambda args: puzzle(6, 'cryptogram').apply_cipher(*args),
+    ),
+    'move_bunny': (
+        lambda n, rng: [rng.randint(1, 6) for _ in range(n)],
+        lambda throws: _move_bunny_calls(puzzle(6, 'funny_bunny'), throws),
+    ),
+    'determine_reward': (
+        lambda n, rng: [[rng.choice('ABC') for _ in range(3)] for _ in range(n)],
+        lambda spins: _determine_reward_calls(puzzle(4, 'fruit_machine'), spins),
+    ),
+    'count_points': (
+        lambda n, rng: ['1'] * n,
+        lambda points: puzzle(6, 'molkky').count_points(points),
+    ),
+}
+
+
+def time_call(func, arg, repeats=5, min_time=0.02):
+    """Best per-call time in seconds over ``repeats`` runs of at least ``min_time``."""
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func(arg)
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+        loops *= 2 if elapsed == 0 else min(10, max(2, math.ceil(min_time / elapsed)))
+
+    best = elapsed
+    for _ in range(repeats - 1):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func(arg)
+        best = min(best, time.perf_counter() - started)
+    return best / loops
+
+
+def _calibration_loop(n):
+    total = 0
+    for i in range(n):
+        total += i * i
+    return total
+
+
+def calibrate():
+    """Per-call time of a fixed pure-Python loop: how fast this machine is right now."""
+    return time_call(_calibration_loop, 10_000)
+
+
+def fit_complexity(sizes, seconds):
+    """The complexity class that best explains the timings, and the log-log slope.
+
+    Each class is fitted as ``seconds = c * f(n)`` by least squares on the
+    relative error, so the small sizes count as much as the large ones. A
+    worse class is only picked if it halves the error of a better one, so
+    timing noise doesn't flip a benchmark between neighbouring classes.
+    """
+    best_name, best_error = None, math.inf
+    for name, growth in COMPLEXITIES:
+        ratios = [t / growth(n) for n, t in zip(sizes, seconds)]
+        # Minimises sum((1 - c * f(n) / t) ** 2)
+        inverse = [1 / r for r in ratios]
+        c = sum(inverse) / sum(x * x for x in inverse)
+        error = sum((1 - c * x) ** 2 for x in inverse)
+        if error < best_error / 2:
+            best_name, best_error = name, error
+
+    xs = [math.log(n) for n in sizes]
+    ys = [math.log(t) for t in seconds]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    spread = sum((x - mean_x) ** 2 for x in xs)
+    exponent = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / spread if spread else 0.0
+    return best_name, exponent
+
+
+def run_benchmark(name, sizes, seed=0):
+    make_input, run = BENCHMARKS[name]
+    rng = random.Random(seed)
+    seconds = [time_call(run, make_input(n, rng)) for n in sizes]
+    # Timed next to the largest size, which is the one wall times are compared at
+    calibration = calibrate()
+    complexity, exponent = fit_complexity(sizes, seconds)
+    return {
+        'sizes': sizes, 'seconds': seconds, 'complexity': complexity, 'exponent': exponent,
+        'calibration': calibration,
+    }
+
+
+def compare(results, baseline, tolerance=None):
+    """Regressions of ``results`` against ``baseline``, as readable messages.
+
+    Both map benchmark names to what ``run_benchmark`` returns. Wall times
+    are only compared when a ``tolerance`` is given, scaled by the
+    calibration time measured next to each benchmark.
+    """
+    rank = {name: i for i, (name, _) in enumerate(COMPLEXITIES)}
+    regressions = []
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+
+        # Noise can still nudge the fit; a real change also moves the slope
+        if (rank[result['complexity']] > rank[old['complexity']]
+                and result['exponent'] - old['exponent'] >= MIN_EXPONENT_CHANGE):
+            regressions.append(f"{name}: {old['complexity']} -> {result['complexity']}")
+
+        common = set(result['sizes']) & set(old['sizes'])
+        if tolerance is None or not common:
+            continue
+        n = max(common)
+        new_time = result['seconds'][result['sizes'].index(n)]
+        old_time = old['seconds'][old['sizes'].index(n)]
+        if min(new_time, old_time) < MIN_COMPARABLE_SECONDS:
+            continue
+        # As if this run had been on a machine as fast as the baseline's
+        slowdown = (new_time / result['calibration']) / (old_time / old['calibration'])
+        if slowdown > 1 + tolerance:
+            regressions.append(f'{name}: {slowdown:.2f}x slower at n={n} (calibrated)')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('names', nargs='*', help='only run these benchmarks')
+    parser.add_argument('--max-exp', type=int, default=14, help='largest size is 2**MAX_EXP (default: 14)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', metavar='BASELINE', help='compare with results written by --output')
+    parser.add_argument('--tolerance', type=float, default=None,
+                        help='with --compare, also fail on a calibrated slowdown above this at the '
+                             'largest size, e.g. 0.5 (default: only complexity classes are compared)')
+    args = parser.parse_args()
+
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+
+    sizes = [2 ** exp for exp in range(6, args.max_exp + 1)]
+    results = {}
+    for name in args.names or BENCHMARKS:
+        result = results[name] = run_benchmark(name, sizes, args.seed)
+        print(f"{name:<30} {result['complexity']:<11} n^{result['exponent']:.2f}  "
+              f"{result['seconds'][-1] * 1000:10.3f} ms at n={sizes[-1]}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'python': platform.python_version(), 'benchmarks': results}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)['benchmarks']
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION  {regression}')
+        if regressions:
+            sys.exit(1)
+        print(f'No regressions against {args.compare}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Build the puzzle catalog served by the round and puzzle API routes.
+
+Every puzzle under ``public/Round N/`` is parsed with ``ast`` and described
+in ``app/api/catalog.json``: its code, size, SHA-256 and what it does at the
+top level (the functions it defines, how many places call ``input()``, and
+whether it seeds ``random``). The routes import the catalog, so they never
+read ``public/`` at request time. Rerun this after changing a puzzle:
+
+    python scripts/build_catalog.py           # rewrite the catalog
+    python scripts/build_catalog.py --check   # exit 1 if it is out of date
+"""
+import argparse
+import ast
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+from puzzle_loader import discover_puzzles
+
+CATALOG_PATH = Path(__file__).resolve().parent.parent / 'app' / 'api' / 'catalog.json'
+
+# First keyword found in the file name -> description shown on the puzzle page
+DESCRIPTIONS = [
+    ('battery', 'Calculate charging speed and time remaining for a device battery based on charging data.'),
+    ('first', 'A simple introduction to Python programming - your first step into the coding world.'),
+    ('potato', 'Solve the famous potato paradox - a mathematical puzzle about water content and weight.'),
+    ('scooter', 'Analyze electric scooter performance and calculate optimal usage patterns.'),
+    ('lamp', 'Diagnose lighting system problems and determine the correct troubleshooting steps.'),
+    ('map', 'Scale map coordinates and calculate distances between geographical points.'),
+    ('sweater', 'Help Sakari choose the perfect sweater based on weather conditions and preferences.'),
+    ('matrix', 'Work with 2D matrices to find local maxima and perform matrix transformations.'),
+    ('triangle', 'Determine triangle properties and classify triangles based on their side lengths.'),
+    ('fruit', 'Simulate a fruit machine and calculate probabilities of winning combinations.'),
+    ('basketball', 'Analyze basketball game statistics and calculate team performance metrics.'),
+    ('salary', 'Process salary data and generate comprehensive statistics for payroll analysis.'),
+]
+
+
+def display_name(filename):
+    return ' '.join(word[:1].upper() + word[1:] for word in filename.split('_'))
+
+
+def describe(filename):
+    for keyword, description in DESCRIPTIONS:
+        if keyword in filename:
+            return description
+    return (f'A challenging {display_name(filename).lower()} puzzle that will test your Python '
+            f'programming skills and problem-solving abilities.')
+
+
+def _is_call_to(node, name, module=None):
+    if not isinstance(node, ast.Call):
+        return False
+    func = node.func
+    if module is None:
+        return isinstance(func, ast.Name) and func.id == name
+    return (
+        isinstance(func, ast.Attribute) and func.attr == name
+        and isinstance(func.value, ast.Name) and func.value.id == module
+    )
+
+
+def analyze(source):
+    """What a puzzle does, as far as its syntax tree tells."""
+    tree = ast.parse(source)
+    nodes = list(ast.walk(tree))
+    return {
+        'functions': [node.name for node in tree.body if isinstance(node, ast.FunctionDef)],
+        'inputSites': sum(_is_call_to(node, 'input') for node in nodes),
+        'seedsRandom': any(_is_call_to(node, 'seed', 'random') for node in nodes),
+    }
+
+
+def build_catalog():
+    rounds = {}
+    for round_number, filename, path in discover_puzzles():
+        source = path.read_bytes()
+        code = source.decode('utf-8')
+        metadata = analyze(code)
+        rounds.setdefault(str(round_number), []).append({
+            'filename': filename,
+            'name': display_name(filename),
+            'description': describe(filename),
+            **metadata,
+            # Programs that never call input() can run without a terminal
+            'interactive': metadata['inputSites'] > 0,
+            'size': len(source),
+            'sha256': hashlib.sha256(source).hexdigest(),
+            'code': code,
+        })
+    return {'rounds': rounds}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--check', action='store_true', help='only check that the catalog is up to date')
+    args = parser.parse_args()
+
+    text = json.dumps(build_catalog(), indent=2, ensure_ascii=False) + '\n'
+
+    if args.check:
+        current = CATALOG_PATH.read_text(encoding='utf-8') if CATALOG_PATH.exists() else ''
+        if current != text:
+            sys.exit(f'{CATALOG_PATH} is out of date; run python scripts/build_catalog.py')
+        print(f'{CATALOG_PATH} is up to date')
+        return
+
+    CATALOG_PATH.write_text(text, encoding='utf-8')
+    print(f'Wrote {CATALOG_PATH}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+"""Batch mode for feeding large piped datasets to the puzzles.
+
+The puzzles read every value with its own ``input()`` call and usually print
+a prompt before each one. That is fine for a person at a terminal, but
+piping a million values through them spends most of the time in per-call
+overhead and in printing the same prompt a million times.
+
+``install()`` replaces ``input()`` with a reader that pulls stdin through
+``sys.stdin.buffer`` in large chunks and splits it into lines in bulk, and
+replaces ``sys.stdout`` with a block-buffered stream that leaves out repeated
+prompts. Text passed to ``input()`` is left out when it exactly repeats the
+previous prompt.
+A printed line is only left out if the puzzle opts in by listing its
+per-value prompts in ``PROMPTS`` (or they are given with ``--prompt``), and
+then only after the first line matching each pattern. Any other output is
+never discarded. The puzzle code itself does not change:
+
+    python scripts/fast_input.py "public/Round 3/step_counter.py" < steps.txt
+    python scripts/fast_input.py puzzle.py --prompt "Value \\d+:" < values.txt
+"""
+import argparse
+import atexit
+import builtins
+import io
+import itertools
+import re
+import sys
+from pathlib import Path
+
+from puzzle_loader import run_main
+
+CHUNK_SIZE = 1 << 20
+OUTPUT_BUFFER_SIZE = 1 << 16
+
+# Puzzle file name -> patterns of the lines it prints before reading each value
+PROMPTS = {
+    'step_counter': [
+        r'What is your step goal for the day \d+\?',
+        r'Distance of the journey \d+ in meters:',
+    ],
+    'basketball': [
+        r'How far from the basket did you throw the field goal \d+ \(m\)\?',
+    ],
+}
+
+
+class BulkLineReader:
+    """Lines of a binary stream, decoded a chunk at a time."""
+
+    def __init__(self, stream, chunk_size=CHUNK_SIZE, encoding='utf-8'):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.encoding = encoding
+        # Stepping through the chunks' line lists happens in C
+        self._lines = itertools.chain.from_iterable(self._chunks())
+
+    def readline(self):
+        """The next line without its line ending; raises EOFError at the end."""
+        try:
+            return next(self._lines)
+        except StopIteration:
+            raise EOFError('EOF when reading a line') from None
+
+    def _chunks(self):
+        tail = b''
+        while True:
+            # read1() returns what is available instead of waiting for a full chunk
+            chunk = self.stream.read1(self.chunk_size)
+            if not chunk:
+                break
+
+            data = tail + chunk
+            end = data.rfind(b'\n')
+            if end < 0:
+                tail = data
+                continue
+            data, tail = data[:end], data[end + 1:]
+            yield self._decode(data)
+
+        if tail:
+            yield self._decode(tail)
+
+    def _decode(self, data):
+        if b'\r' in data:
+            data = data.replace(b'\r\n', b'\n')
+        return data.decode(self.encoding).split('\n')
+
+
+class PromptFilter(io.TextIOBase):
+    """A text stream that drops repeated prompts on their way to ``stream``.
+
+    Text passed to ``input()`` is dropped if it is exactly the same as the
+    previous ``input()`` prompt. The last line printed before an ``input()`` call is dropped only
+    if it matches one of ``prompts`` (regular expressions matched against
+    the whole line) and an earlier line already matched the same pattern.
+    Nothing else is ever dropped.
+
+    Output is held in memory until the program asks for input or flushes, or
+    until another ``buffer_size`` characters have been written. Then
+    everything but the last line, which may yet turn out to be a prompt,
+    goes to ``stream``.
+    """
+
+    def __init__(self, stream, prompts=(), buffer_size=OUTPUT_BUFFER_SIZE):
+        self.stream = stream
+        self.chunks = []
+        self.patterns = [re.compile(pattern) for pattern in prompts]
+        self.last_prompt = None
+        # Indexes of the patterns already shown
+        self.shown_patterns = set()
+        # print() looks up write() on the instance; a closure over locals is
+        # several times faster here than a method using instance attributes
+        self.write = self._writer(buffer_size)
+
+    def writable(self):
+        return True
+
+    def _writer(self, buffer_size):
+        append = self.chunks.append
+        drain = self._drain
+        written = 0
+
+        def write(text):
+            nonlocal written
+            append(text)
+            written += len(text)
+            if written > buffer_size:
+                written = 0
+                drain()
+            return len(text)
+
+        return write
+
+    def _drain(self):
+        chunks = self.chunks
+        text = ''.join(chunks)
+        start = text.rfind('\n', 0, len(text) - 1) + 1
+        # A single line longer than the buffer is no prompt
+        if not start:
+            start = len(text)
+        self.stream.write(text[:start])
+        chunks.clear()
+        if start < len(text):
+            chunks.append(text[start:])
+
+    def prompt(self, prompt=''):
+        """Called with the text passed to ``input()`` when the program asks for input."""
+        chunks = self.chunks
+        if chunks:
+            text = ''.join(chunks)
+            chunks.clear()
+            if self.patterns:
+                # Everything before the last line is ordinary output
+                start = text.rfind('\n', 0, len(text) - 1) + 1
+                if self._repeats_pattern(text[start:]):
+                    text = text[:start]
+            self.stream.write(text)
+
+        if prompt:
+            prompt = str(prompt)
+            if prompt != self.last_prompt and not self._repeats_pattern(prompt):
+                self.stream.write(prompt)
+            self.last_prompt = prompt
+
+    def _repeats_pattern(self, line):
+        """Whether ``line`` is a prompt whose pattern has been shown before."""
+        line = line.strip()
+        for index, pattern in enumerate(self.patterns):
+            if pattern.fullmatch(line):
+                if index in self.shown_patterns:
+                    return True
+                self.shown_patterns.add(index)
+                return False
+        return False
+
+    def flush(self):
+        self.stream.write(''.join(self.chunks))
+        self.chunks.clear()
+        self.stream.flush()
+
+
+def install(stdin=None, stdout=None, prompts=()):
+    """Switch ``input()`` and ``sys.stdout`` to batch mode.
+
+    ``prompts`` are the patterns of printed prompts to show only once (see
+    ``PromptFilter``). Returns the reader, whose ``readline()`` can also be
+    used directly.
+    """
+    stdin = stdin if stdin is not None else sys.stdin.buffer
+    stdout = stdout if stdout is not None else io.TextIOWrapper(
+        io.BufferedWriter(io.FileIO(sys.stdout.fileno(), 'wb', closefd=False), OUTPUT_BUFFER_SIZE),
+        encoding='utf-8',
+    )
+
+    reader = BulkLineReader(stdin)
+    output = PromptFilter(stdout, prompts)
+    prompt = output.prompt
+    lines = reader._lines
+
+    def batch_input(text=''):
+        prompt(text)
+        try:
+            return next(lines)
+        except StopIteration:
+            raise EOFError('EOF when reading a line') from None
+
+    builtins.input = batch_input
+    sys.stdout = output
+    atexit.register(output.flush)
+    return reader
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('puzzle', help='puzzle file; its input is read from stdin')
+    parser.add_argument('--prompt', action='append', default=[], metavar='REGEX',
+                        help='a printed prompt to show only once (repeatable), on top of PROMPTS')
+    args = parser.parse_args()
+
+    install(prompts=PROMPTS.get(Path(args.puzzle).stem, []) + args.prompt)
+    run_main(args.puzzle)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""Batch triage for the lamp diagnostics decision flow.
+
+``public/Round 2/lamp_diagnostics.py`` defines its switch -> plug -> breaker
+questions once, as ``DIAGNOSTIC_STEPS``. This module compiles that same list
+into:
+
+* an interactive walker equivalent to the puzzle's ``main()``, and
+* a 256-entry translation table that maps packed tickets to action codes.
+
+A ticket packs one yes/no answer per step into a byte: bit ``i`` is set when
+the answer to step ``i`` is "yes". The action code is the index of the first
+step answered "no", or ``len(DIAGNOSTIC_STEPS)`` when every check passes and
+the fault is unknown. Bits above the last step are ignored. Triage of a whole
+``bytes``/``bytearray`` of tickets is then a single ``bytes.translate``.
+
+Run it directly to check the batch path against the puzzle and benchmark it:
+
+    python scripts/lamp_triage.py --tickets 10000000
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import os
+import time
+from unittest import mock
+
+from puzzle_loader import puzzle_path, read_constant, run_main
+
+PUZZLE_PATH = puzzle_path(2, 'lamp_diagnostics')
+DIAGNOSTIC_STEPS = read_constant(PUZZLE_PATH, 'DIAGNOSTIC_STEPS')
+UNKNOWN_FAULT = read_constant(PUZZLE_PATH, 'UNKNOWN_FAULT')
+
+ACTIONS = [fix for _, fix in DIAGNOSTIC_STEPS] + [UNKNOWN_FAULT]
+UNKNOWN_FAULT_CODE = len(DIAGNOSTIC_STEPS)
+
+
+def pack_ticket(*answers):
+    """Pack yes/no answers (truthy = yes), in step order, into a ticket byte."""
+    if len(answers) > len(DIAGNOSTIC_STEPS):
+        raise ValueError(f'Expected at most {len(DIAGNOSTIC_STEPS)} answers')
+    ticket = 0
+    for bit, answer in enumerate(answers):
+        if answer:
+            ticket |= 1 << bit
+    return ticket
+
+
+def walk(answer, steps=DIAGNOSTIC_STEPS):
+    """Walk the decision flow, calling ``answer(step)`` for each question.
+
+    Returns the action code. Questions after the first "no" are never asked,
+    exactly like the interactive puzzle.
+    """
+    for step in range(len(steps)):
+        if not answer(step):
+            return step
+    return len(steps)
+
+
+def run_interactive(steps=DIAGNOSTIC_STEPS, read=input, write=print):
+    """The puzzle's interactive walker, compiled from ``steps``."""
+    write('-- Lamp diagnostics --')
+
+    def ask(step):
+        write(steps[step][0])
+        return int(read()) != 0
+
+    code = walk(ask, steps)
+    write(ACTIONS[code])
+    return code
+
+
+def compile_table(steps=DIAGNOSTIC_STEPS):
+    """Translation table mapping every possible ticket byte to its action code."""
+    if len(steps) > 8:
+        raise ValueError('A ticket byte holds at most 8 answers')
+    return bytes(walk(lambda step: ticket >> step & 1, steps) for ticket in range(256))
+
+
+TRIAGE_TABLE = compile_table()
+
+
+def triage(tickets):
+    """Action code for each packed ticket, as ``bytes`` of the same length."""
+    return bytes(tickets).translate(TRIAGE_TABLE)
+
+
+def action_counts(codes):
+    return {ACTIONS[code]: codes.count(code) for code in range(len(ACTIONS))}
+
+
+def run_puzzle(answers):
+    """Run the real puzzle with scripted answers and return its last line."""
+    replies = iter(answers)
+    output = io.StringIO()
+    with mock.patch('builtins.input', lambda prompt='': str(next(replies))), \
+            contextlib.redirect_stdout(output):
+        run_main(PUZZLE_PATH)
+    return output.getvalue().splitlines()[-1]
+
+
+def verify():
+    """Check that batch triage agrees with the puzzle for every ticket."""
+    for answers in itertools.product((0, 1), repeat=len(DIAGNOSTIC_STEPS)):
+        expected = run_puzzle(answers)
+        code = triage([pack_ticket(*answers)])[0]
+        if ACTIONS[code] != expected:
+            raise AssertionError(f'{answers}: batch says {ACTIONS[code]!r}, puzzle says {expected!r}')
+
+        replies = iter(answers)
+        lines = []
+        if run_interactive(read=lambda: next(replies), write=lines.append) != code:
+            raise AssertionError(f'{answers}: interactive walker disagrees with batch triage')
+
+
+def benchmark(tickets):
+    packed = os.urandom(tickets)
+    started = time.perf_counter()
+    codes = triage(packed)
+    elapsed = time.perf_counter() - started
+    print(f'{tickets} tickets in {elapsed * 1000:.1f} ms ({tickets / elapsed:,.0f} tickets/s)')
+    for action, count in action_counts(codes).items():
+        print(f'{count:>12d}  {action}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tickets', type=int, default=10_000_000)
+    args = parser.parse_args()
+
+    verify()
+    print(f'Batch triage agrees with the puzzle for all {2 ** len(DIAGNOSTIC_STEPS)} answer combinations.')
+    benchmark(args.tickets)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""Reentrant scoring for minigolf rounds.
+
+The interactive puzzle in ``public/Round 5/minigolf.py`` scores a single
+round typed in by hand. This module scores stroke vectors against the same
+``PARS`` without any module-level state, so a long-lived process can score
+any number of rounds, and keeps running per-hole statistics whose memory
+does not grow with the number of rounds.
+
+Run it directly to benchmark throughput and memory:
+
+    python scripts/minigolf_scoring.py --rounds 2000000
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from array import array
+
+from puzzle_loader import puzzle_path, read_constant
+
+PARS = tuple(read_constant(puzzle_path(5, 'minigolf'), 'PARS'))
+
+BELOW_PAR = -1
+PAR = 0
+ABOVE_PAR = 1
+
+SCORE_NAMES = {
+    BELOW_PAR: 'below par',
+    PAR: 'a par',
+    ABOVE_PAR: 'above par',
+}
+
+
+def classify(strokes, pars=PARS):
+    """Classify one round, returning BELOW_PAR / PAR / ABOVE_PAR for each hole."""
+    if len(strokes) != len(pars):
+        raise ValueError(f'Expected {len(pars)} holes, got {len(strokes)}')
+    return [(stroke > par) - (stroke < par) for stroke, par in zip(strokes, pars)]
+
+
+def classify_rounds(rounds, pars=PARS):
+    """Classify many rounds at once."""
+    return [classify(strokes, pars) for strokes in rounds]
+
+
+class HoleStatistics:
+    """Running per-hole aggregates over any number of rounds.
+
+    Every update is O(holes) regardless of how many rounds have been seen:
+    the stroke totals live in fixed-size arrays and the distribution
+    relative to par only has one counter per distinct difference.
+    """
+
+    def __init__(self, pars=PARS):
+        self.pars = tuple(pars)
+        self.rounds = 0
+        self.stroke_totals = array('q', [0] * len(self.pars))
+        self.score_counts = [array('q', [0, 0, 0]) for _ in self.pars]
+        self.relative_counts = [{} for _ in self.pars]
+
+    def add_round(self, strokes):
+        """Record one round and return its classification."""
+        scores = classify(strokes, self.pars)
+        totals = self.stroke_totals
+        for hole, (stroke, par, score) in enumerate(zip(strokes, self.pars, scores)):
+            totals[hole] += stroke
+            self.score_counts[hole][score + 1] += 1
+            relative = self.relative_counts[hole]
+            difference = stroke - par
+            relative[difference] = relative.get(difference, 0) + 1
+        self.rounds += 1
+        return scores
+
+    def add_rounds(self, rounds):
+        for strokes in rounds:
+            self.add_round(strokes)
+
+    def mean_strokes(self):
+        if self.rounds == 0:
+            return [0.0] * len(self.pars)
+        return [total / self.rounds for total in self.stroke_totals]
+
+    def distribution(self):
+        """Share of rounds below, at and above par for each hole."""
+        rounds = self.rounds or 1
+        return [
+            {SCORE_NAMES[score]: counts[score + 1] / rounds for score in (BELOW_PAR, PAR, ABOVE_PAR)}
+            for counts in self.score_counts
+        ]
+
+    def summary(self):
+        return [
+            {
+                'hole': hole + 1,
+                'par': par,
+                'mean_strokes': mean,
+                'distribution': distribution,
+                'relative_to_par': dict(sorted(relative.items())),
+            }
+            for hole, (par, mean, distribution, relative) in enumerate(
+                zip(self.pars, self.mean_strokes(), self.distribution(), self.relative_counts)
+            )
+        ]
+
+
+def benchmark(rounds, checkpoints=10, seed=0):
+    """Score ``rounds`` random rounds, printing throughput and traced memory."""
+    rng = random.Random(seed)
+    # Pre-generate a pool so the benchmark measures scoring, not the RNG.
+    pool = [[max(1, par + rng.randint(-1, 3)) for par in PARS] for _ in range(4096)]
+    stats = HoleStatistics()
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    step = max(1, rounds // checkpoints)
+    started = time.perf_counter()
+    for i in range(rounds):
+        stats.add_round(pool[i & 4095])
+        if (i + 1) % step == 0:
+            current, peak = tracemalloc.get_traced_memory()
+            elapsed = time.perf_counter() - started
+            print(f'{i + 1:>10d} rounds  {(i + 1) / elapsed:>10.0f} rounds/s  '
+                  f'memory {current - baseline:>8d} B (peak {peak - baseline} B)')
+    tracemalloc.stop()
+
+    # Throughput without tracemalloc overhead.
+    stats = HoleStatistics()
+    started = time.perf_counter()
+    stats.add_rounds(pool[i & 4095] for i in range(rounds))
+    elapsed = time.perf_counter() - started
+    print(f'untraced: {rounds} rounds in {elapsed:.2f} s ({rounds / elapsed:.0f} rounds/s)')
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    stats = benchmark(args.rounds, seed=args.seed)
+    for hole in stats.summary():
+        print(f"HOLE {hole['hole']}: par {hole['par']}, mean {hole['mean_strokes']:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""Helpers for using the puzzles under ``public/Round N/`` from tooling.
+
+Puzzles are compiled once per content: code objects are kept in memory and
+marshalled to ``scripts/__pycache__/puzzles/``, keyed by the SHA-256 of the
+source and the interpreter's cache tag, so later runs and other processes
+skip the compile step.
+"""
+import ast
+import hashlib
+import marshal
+import os
+import sys
+import types
+from pathlib import Path
+
+PUZZLES_DIR = Path(__file__).resolve().parent.parent / 'public'
+CACHE_DIR = Path(__file__).resolve().parent / '__pycache__' / 'puzzles'
+
+_code_cache = {}
+_module_cache = {}
+
+
+def puzzle_path(round_number, name):
+    return PUZZLES_DIR / f'Round {round_number}' / f'{name}.py'
+
+
+def discover_puzzles():
+    """Every puzzle as ``(round_number, name, path)``, in round order."""
+    puzzles = []
+    for round_dir in PUZZLES_DIR.glob('Round *'):
+        round_number = int(round_dir.name.split()[-1])
+        for path in round_dir.glob('*.py'):
+            puzzles.append((round_number, path.stem, path))
+    return sorted(puzzles)
+
+
+def read_constant(path, name):
+    """Read a literal top-level constant from a puzzle without running it."""
+    tree = ast.parse(Path(path).read_text(encoding='utf-8'))
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id == name for target in node.targets
+        ):
+            return ast.literal_eval(node.value)
+    raise LookupError(f'{name} is not defined in {path}')
+
+
+def _is_main_call(node):
+    return (
+        isinstance(node, ast.Expr)
+        and isinstance(node.value, ast.Call)
+        and isinstance(node.value.func, ast.Name)
+        and node.value.func.id == 'main'
+    )
+
+
+def _read_source(path):
+    source = Path(path).read_bytes()
+    return source, hashlib.sha256(source).hexdigest()
+
+
+def _compile(path, source, digest, library):
+    key = (digest, library)
+    code = _code_cache.get(key)
+    if code is not None:
+        return code
+
+    cache_file = CACHE_DIR / f"{digest}.{sys.implementation.cache_tag}.{'lib' if library else 'main'}"
+    try:
+        code = marshal.loads(cache_file.read_bytes())
+    except (OSError, EOFError, ValueError, TypeError):
+        tree = ast.parse(source, filename=str(path))
+        if library:
+            tree.body = [node for node in tree.body if not _is_main_call(node)]
+        code = compile(tree, str(path), 'exec')
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            temporary = cache_file.with_suffix(f'.{os.getpid()}.tmp')
+            temporary.write_bytes(marshal.dumps(code))
+            os.replace(temporary, cache_file)
+        except OSError:
+            # A read-only checkout still works, it just compiles every time
+            pass
+
+    _code_cache[key] = code
+    return code
+
+
+def compile_puzzle(path, library=False):
+    """The puzzle's code object, from the cache when its source is unchanged.
+
+    With ``library=True`` the top-level ``main()`` calls are left out.
+    """
+    source, digest = _read_source(path)
+    return _compile(path, source, digest, library)
+
+
+def load_puzzle(path, fresh=False):
+    """Import a puzzle as a module without running its interactive ``main()``.
+
+    Every puzzle ends with a bare ``main()`` call; top-level calls to ``main``
+    are dropped before the source is executed, so the module only defines its
+    constants and functions. ``module.main()`` still runs the program.
+
+    The module is reused until the file changes; pass ``fresh=True`` for a
+    new one, e.g. when the program keeps state in module globals.
+
+    The Round 1 puzzles are plain scripts with no ``main()``; loading one of
+    those runs it.
+    """
+    path = Path(path).resolve()
+    source, digest = _read_source(path)
+    cached = _module_cache.get(path)
+    if cached is not None and not fresh and cached[0] == digest:
+        return cached[1]
+
+    module = types.ModuleType(path.stem)
+    module.__file__ = str(path)
+    exec(_compile(path, source, digest, library=True), module.__dict__)
+    _module_cache[path] = (digest, module)
+    return module
+
+
+def run_main(path):
+    """Run a puzzle as a program, like ``python path`` but without recompiling it."""
+    path = Path(path)
+    namespace = {'__name__': '__main__', '__file__': str(path)}
+    exec(compile_puzzle(path), namespace)
+    return namespace
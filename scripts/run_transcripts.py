@@ -0,0 +1,125 @@
+"""Run every puzzle headlessly against recorded stdin transcripts.
+
+For each puzzle under ``public/Round N/`` with a transcript in
+``scripts/transcripts/Round N/<name>.in``, the puzzle is run in-process with
+``puzzle_loader.run_main``, which takes the compiled code from the bytecode
+cache: ``input()`` reads from the transcript and everything printed goes to
+an in-memory buffer. The output is compared with the golden file
+``<name>.out`` next to the transcript. Puzzles run in parallel across a
+process pool.
+
+    python scripts/run_transcripts.py             # check every puzzle
+    python scripts/run_transcripts.py matrix      # only puzzles named matrix
+    python scripts/run_transcripts.py --update    # rewrite the golden files
+
+Exits with status 1 if any puzzle's output differs from its golden file.
+"""
+import argparse
+import builtins
+import contextlib
+import difflib
+import io
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from puzzle_loader import discover_puzzles, run_main
+
+TRANSCRIPTS_DIR = Path(__file__).resolve().parent / 'transcripts'
+
+
+def transcript_paths(round_number, name):
+    directory = TRANSCRIPTS_DIR / f'Round {round_number}'
+    return directory / f'{name}.in', directory / f'{name}.out'
+
+
+def read_transcript(path):
+    """The lines a user would type, in order. Empty lines are kept."""
+    text = path.read_text(encoding='utf-8')
+    if text.endswith('\n'):
+        text = text[:-1]
+    return text.split('\n') if text else []
+
+
+def run_puzzle(path, lines):
+    """Run one puzzle with scripted input and return ``(output, seconds)``."""
+    replies = iter(lines)
+    output = io.StringIO()
+
+    def scripted_input(prompt=''):
+        output.write(str(prompt))
+        try:
+            return next(replies)
+        except StopIteration:
+            raise EOFError('EOF when reading a line') from None
+
+    original_input = builtins.input
+    builtins.input = scripted_input
+    started = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(output):
+            run_main(path)
+    except Exception as e:
+        output.write(f'{type(e).__name__}: {e}\n')
+    finally:
+        elapsed = time.perf_counter() - started
+        builtins.input = original_input
+
+    return output.getvalue(), elapsed
+
+
+def check_puzzle(round_number, name, path, update=False):
+    """Run a puzzle against its transcript; returns ``(status, seconds, diff)``."""
+    transcript, golden = transcript_paths(round_number, name)
+    if not transcript.exists():
+        return 'missing', 0.0, ''
+
+    output, elapsed = run_puzzle(path, read_transcript(transcript))
+
+    if update:
+        golden.write_text(output, encoding='utf-8')
+        return 'updated', elapsed, ''
+
+    expected = golden.read_text(encoding='utf-8') if golden.exists() else ''
+    if output == expected:
+        return 'ok', elapsed, ''
+
+    diff = ''.join(difflib.unified_diff(
+        expected.splitlines(keepends=True), output.splitlines(keepends=True),
+        fromfile=str(golden.relative_to(TRANSCRIPTS_DIR)), tofile='actual',
+    ))
+    return 'FAILED', elapsed, diff
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('names', nargs='*', help='only run puzzles with these names')
+    parser.add_argument('--update', action='store_true', help='rewrite the golden output files')
+    parser.add_argument('--jobs', type=int, default=None, help='worker processes (default: CPU count)')
+    args = parser.parse_args()
+
+    puzzles = [puzzle for puzzle in discover_puzzles() if not args.names or puzzle[1] in args.names]
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        futures = [
+            executor.submit(check_puzzle, round_number, name, path, args.update)
+            for round_number, name, path in puzzles
+        ]
+        results = [future.result() for future in futures]
+    wall_time = time.perf_counter() - started
+
+    failed = 0
+    for (round_number, name, _), (status, elapsed, diff) in zip(puzzles, results):
+        print(f'{status:>8}  {elapsed * 1000:8.2f} ms  Round {round_number}/{name}')
+        if diff:
+            print(diff)
+        failed += status in ('FAILED', 'missing')
+
+    print(f'{len(puzzles)} puzzles in {wall_time * 1000:.0f} ms, {failed} failed')
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
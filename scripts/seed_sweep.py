@@ -0,0 +1,256 @@
+"""Sweep the seeded games over millions of seeds and query the results.
+
+``fruit_machine.py``, ``funny_bunny.py``, ``cryptogram.py`` and ``matrix.py``
+call ``random.seed()`` with a number the player types, and everything they
+generate afterwards follows from that seed. ``build`` replays each game's
+generation step for a range of seeds, in the same order as the game's
+``main()``, across a pool of worker processes, and stores a few features per
+seed in a columnar index: a directory with ``index.json`` and one file per
+column holding one byte per seed. ``query`` filters the index with
+conditions on its columns:
+
+    python scripts/seed_sweep.py build seeds --seeds 0:10000000
+    python scripts/seed_sweep.py query seeds "fruit_first_spin == 2"
+    python scripts/seed_sweep.py query seeds "bunny_min_moves == 255" --limit 5
+
+Each condition becomes a 256-byte lookup table applied to its column with
+``bytes.translate``, and the resulting masks are ANDed as big integers, so
+queries over millions of seeds run at memory speed.
+"""
+import argparse
+import json
+import operator
+import random
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+from puzzle_loader import load_puzzle, puzzle_path
+
+INDEX_FILE = 'index.json'
+CHUNK_SIZE = 1 << 16
+
+# Every feature fits in a byte; UNREACHABLE marks a bunny board that can't be won
+UNREACHABLE = 255
+
+# Column name -> what it holds
+COLUMNS = {
+    'fruit_first_spin': '2 if the first spin is a jackpot, 1 if a double, else 0',
+    'bunny_holes': 'distinct holes on the bunny board',
+    'bunny_longest_hole_run': 'longest run of holes along the bunny path',
+    'bunny_min_moves': f'fewest throws that reach the carrot, {UNREACHABLE} if unwinnable',
+    'cryptogram_sentence': 'index of the sentence in SENTENCES',
+    'cryptogram_letters': 'distinct letters in the sentence',
+    'cryptogram_unique_letters': 'letters that appear exactly once in the sentence',
+    'cryptogram_fixed_letters': 'letters the cipher maps to themselves',
+    'matrix_max': 'largest value in the matrix',
+    'matrix_local_maxima': 'local maxima in the matrix (capped at 255)',
+}
+
+OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<=': operator.le,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '>': operator.gt,
+}
+
+CONDITION = re.compile(r'^\s*(\w+)\s*(==|!=|<=|>=|<|>)\s*(\d+)\s*$')
+
+
+@lru_cache(maxsize=None)
+def puzzle(round_number, name):
+    return load_puzzle(puzzle_path(round_number, name))
+
+
+def bunny_features(bunny, board):
+    """Hole count, longest run of holes along the path, and fewest throws to win."""
+    holes = {
+        bunny.BOARD[row][column]
+        for row, line in enumerate(board)
+        for column, point in enumerate(line)
+        if point == bunny.HOLE
+    }
+
+    longest = run = 0
+    for position in range(1, 25):
+        if position in holes:
+            run += 1
+            if run > longest:
+                longest = run
+        else:
+            run = 0
+
+    # Throws are 1-6 and only move forward, so one pass finds the fewest throws
+    moves = [0] + [UNREACHABLE] * 24
+    for position in range(25):
+        if moves[position] == UNREACHABLE:
+            continue
+        next_moves = moves[position] + 1
+        for target in range(position + 1, position + 7):
+            if target >= 25:
+                return len(holes), longest, next_moves
+            if next_moves < moves[target] and target not in holes:
+                moves[target] = next_moves
+    return len(holes), longest, UNREACHABLE
+
+
+def seed_features(seed, rows, cols):
+    """Every column's value for one seed, in ``COLUMNS`` order."""
+    fruit_machine = puzzle(4, 'fruit_machine')
+    bunny = puzzle(6, 'funny_bunny')
+    cryptogram = puzzle(6, 'cryptogram')
+    matrix = puzzle(6, 'matrix')
+
+    random.seed(seed)
+    fruit1, fruit2, fruit3 = fruit_machine.get_random_fruits()
+    if fruit1 == fruit2 == fruit3:
+        spin = 2
+    elif fruit1 == fruit2 or fruit2 == fruit3 or fruit1 == fruit3:
+        spin = 1
+    else:
+        spin = 0
+
+    random.seed(seed)
+    holes, longest_run, min_moves = bunny_features(bunny, bunny.create_board())
+
+    random.seed(seed)
+    sentence = random.choice(cryptogram.SENTENCES)
+    text = sentence.upper()
+    cipher, _ = cryptogram.create_cipher(text)
+    unique_letters = sum(1 for letter in cipher if text.count(letter) == 1)
+    fixed_letters = sum(1 for letter, mapped in cipher.items() if letter == mapped)
+
+    random.seed(seed)
+    values = matrix.create_and_fill_matrix(rows, cols)
+    local_maxima = len(matrix.find_list_of_local_max(values))
+
+    return (
+        spin,
+        holes, longest_run, min_moves,
+        cryptogram.SENTENCES.index(sentence), len(cipher), unique_letters, fixed_letters,
+        max(max(row) for row in values), min(local_maxima, 255),
+    )
+
+
+def sweep_chunk(start, stop, rows, cols):
+    """Features of seeds ``start..stop-1`` as one ``bytes`` per column."""
+    columns = [bytearray(stop - start) for _ in COLUMNS]
+    for offset, seed in enumerate(range(start, stop)):
+        for column, value in zip(columns, seed_features(seed, rows, cols)):
+            column[offset] = value
+    return [bytes(column) for column in columns]
+
+
+def build(directory, first_seed, stop_seed, rows, cols, jobs=None):
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    starts = range(first_seed, stop_seed, CHUNK_SIZE)
+    files = [open(directory / f'{name}.u8', 'wb') for name in COLUMNS]
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            chunks = executor.map(
+                sweep_chunk,
+                starts,
+                [min(start + CHUNK_SIZE, stop_seed) for start in starts],
+                [rows] * len(starts),
+                [cols] * len(starts),
+            )
+            # map() yields in order, so the columns are written seed by seed
+            for chunk in chunks:
+                for f, column in zip(files, chunk):
+                    f.write(column)
+    finally:
+        for f in files:
+            f.close()
+
+    meta = {
+        'first_seed': first_seed,
+        'count': stop_seed - first_seed,
+        'matrix_size': [rows, cols],
+        'columns': COLUMNS,
+    }
+    (directory / INDEX_FILE).write_text(json.dumps(meta, indent=2), encoding='utf-8')
+    return meta
+
+
+def parse_condition(text):
+    match = CONDITION.match(text)
+    if not match:
+        raise ValueError(f'Invalid condition {text!r}; expected e.g. "bunny_min_moves == 255"')
+    name, op, value = match.groups()
+    if name not in COLUMNS:
+        raise ValueError(f"Unknown column {name!r}; columns are: {', '.join(COLUMNS)}")
+    return name, op, int(value)
+
+
+def query(directory, conditions):
+    """Seeds in the index at ``directory`` matching every condition, in order."""
+    directory = Path(directory)
+    meta = json.loads((directory / INDEX_FILE).read_text(encoding='utf-8'))
+    count = meta['count']
+
+    # One byte per seed, 1 while the seed still matches
+    mask = int.from_bytes(b'\x01' * count, 'little')
+    for name, op, value in map(parse_condition, conditions):
+        # 1 for the byte values that satisfy the condition, 0 for the rest
+        table = bytes(int(OPERATORS[op](byte, value)) for byte in range(256))
+        column = (directory / f'{name}.u8').read_bytes()
+        mask &= int.from_bytes(column.translate(table), 'little')
+
+    matches = mask.to_bytes(count, 'little')
+    first_seed = meta['first_seed']
+    offset = matches.find(1)
+    while offset >= 0:
+        yield first_seed + offset
+        offset = matches.find(1, offset + 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = commands.add_parser('build', help='sweep a range of seeds into an index')
+    build_parser.add_argument('directory')
+    build_parser.add_argument('--seeds', default='0:1000000', help='START:STOP (default: 0:1000000)')
+    build_parser.add_argument('--matrix-size', default='5x6', help='ROWSxCOLS for matrix.py (default: 5x6)')
+    build_parser.add_argument('--jobs', type=int, default=None, help='worker processes (default: CPU count)')
+
+    query_parser = commands.add_parser(
+        'query', help='list seeds matching every condition',
+        epilog='columns: ' + '; '.join(f'{name}: {about}' for name, about in COLUMNS.items()),
+    )
+    query_parser.add_argument('directory')
+    query_parser.add_argument('conditions', nargs='*', help='e.g. "fruit_first_spin == 2"')
+    query_parser.add_argument('--limit', type=int, default=20, help='seeds to print (default: 20)')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        start, stop = (int(part) for part in args.seeds.split(':'))
+        rows, cols = (int(part) for part in args.matrix_size.lower().split('x'))
+        started = time.perf_counter()
+        build(args.directory, start, stop, rows, cols, args.jobs)
+        elapsed = time.perf_counter() - started
+        print(f'{stop - start} seeds in {elapsed:.1f} s ({(stop - start) / elapsed:.0f} seeds/s)')
+        return
+
+    try:
+        seeds = query(args.directory, args.conditions)
+        shown = [seed for _, seed in zip(range(args.limit), seeds)]
+        total = len(shown) + sum(1 for _ in seeds)
+    except ValueError as e:
+        sys.exit(str(e))
+
+    print(f'{total} matching seeds')
+    for seed in shown:
+        print(seed)
+
+
+if __name__ == '__main__':
+    main()